@@ -0,0 +1,15 @@
+-- Migration: Add latest-row lookup indexes on t_vsm and t_vehicle_charge
+-- Purpose: Let the GET_VEHICLE_CHARGE_STATE* LATERAL joins (and the DISTINCT ON
+--          VSM/charger queries) read each vehicle's latest row with one index scan
+-- Author: Allocation-v2
+-- Date: 2026-10-16
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_vsm_vehicle_date_time
+ON t_vsm(vehicle_id, date_time DESC);
+
+CREATE INDEX IF NOT EXISTS idx_vehicle_charge_vehicle_start
+ON t_vehicle_charge(vehicle_id, start_date_time DESC);
+
+COMMIT;
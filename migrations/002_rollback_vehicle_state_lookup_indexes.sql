@@ -0,0 +1,12 @@
+-- Rollback: Remove latest-row lookup indexes on t_vsm and t_vehicle_charge
+-- Purpose: Revert changes from 002_add_vehicle_state_lookup_indexes.sql
+-- Author: Allocation-v2
+-- Date: 2026-10-16
+
+BEGIN;
+
+DROP INDEX IF EXISTS idx_vehicle_charge_vehicle_start;
+
+DROP INDEX IF EXISTS idx_vsm_vehicle_date_time;
+
+COMMIT;
@@ -0,0 +1,20 @@
+-- Migration: Add unique (schedule_id, vehicle_id, charge_start_date_time) index to t_charge_schedule
+-- Purpose: Conflict target for the charge schedule upsert (UPSERT_CHARGE_SCHEDULE_UNNEST),
+--          so re-persisting a schedule updates changed slots instead of delete + re-insert
+-- Author: Allocation-v2
+-- Date: 2026-10-16
+
+BEGIN;
+
+-- Remove duplicate slots left by earlier runs (keeps one row per slot)
+DELETE FROM t_charge_schedule cs
+USING t_charge_schedule newer
+WHERE cs.schedule_id = newer.schedule_id
+  AND cs.vehicle_id = newer.vehicle_id
+  AND cs.charge_start_date_time = newer.charge_start_date_time
+  AND cs.ctid < newer.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_charge_schedule_slot
+ON t_charge_schedule(schedule_id, vehicle_id, charge_start_date_time);
+
+COMMIT;
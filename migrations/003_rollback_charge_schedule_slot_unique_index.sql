@@ -0,0 +1,11 @@
+-- Rollback: Remove unique slot index from t_charge_schedule
+-- Purpose: Revert changes from 003_add_charge_schedule_slot_unique_index.sql
+--          (the upsert in _persist_schedule requires this index)
+-- Author: Allocation-v2
+-- Date: 2026-10-16
+
+BEGIN;
+
+DROP INDEX IF EXISTS uq_charge_schedule_slot;
+
+COMMIT;
@@ -0,0 +1,16 @@
+-- Migration: Add lookup indexes for routes and their allocations in a window
+-- Purpose: Serve GET_ROUTES_AND_ALLOCATIONS_IN_WINDOW (and the schedule report's
+--          in-window route CTE) with an index range scan on new t_route_plan rows
+--          by (site_id, plan_start_date_time), and its t_route_allocated join on
+--          (route_id, site_id) with an index-only lookup of vehicle_id_allocated
+-- Author: Allocation-v2
+-- Date: 2026-10-16
+-- Note: CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so this
+--       script has no BEGIN/COMMIT; run it statement by statement (psql default).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ra_route_site
+ON t_route_allocated(route_id, site_id) INCLUDE (vehicle_id_allocated);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_route_plan_new_site_start
+ON t_route_plan(site_id, plan_start_date_time)
+WHERE route_status = 'N';
@@ -0,0 +1,9 @@
+-- Rollback: Remove lookup indexes for routes and their allocations in a window
+-- Purpose: Revert changes from 004_add_route_allocation_lookup_indexes.sql
+-- Author: Allocation-v2
+-- Date: 2026-10-16
+-- Note: DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_route_plan_new_site_start;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_ra_route_site;
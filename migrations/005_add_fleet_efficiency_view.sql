@@ -0,0 +1,55 @@
+-- Migration: Add mv_fleet_efficiency materialized view
+-- Purpose: Serve GET_FLEET_EFFICIENCY from a per-site precomputed row instead of
+--          aggregating t_vehicle on every scheduler run / schedule report.
+--          The view is refreshed on a schedule, not by t_vehicle writes; sites
+--          missing from it are aggregated live by GET_FLEET_EFFICIENCY.
+-- Author: Allocation-v2
+-- Date: 2026-10-16
+
+BEGIN;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_fleet_efficiency AS
+SELECT
+    site_id,
+    COUNT(*) AS vehicle_count,
+    AVG(efficiency_kwh_mile) AS fleet_avg_efficiency
+FROM t_vehicle
+WHERE efficiency_kwh_mile IS NOT NULL
+GROUP BY site_id;
+
+-- Required for REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_fleet_efficiency_site
+ON mv_fleet_efficiency(site_id);
+
+-- Refresh entry point for a scheduled job. SECURITY DEFINER runs the refresh
+-- as the function owner (the role running this migration, which also owns the
+-- view), so callers need EXECUTE only, not ownership of mv_fleet_efficiency.
+CREATE OR REPLACE FUNCTION fn_refresh_fleet_efficiency()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_fleet_efficiency;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION fn_refresh_fleet_efficiency() FROM PUBLIC;
+
+-- Refresh every 5 minutes, in line with the 300 s read cache in front of
+-- GET_FLEET_EFFICIENCY. Without pg_cron, schedule
+-- "SELECT fn_refresh_fleet_efficiency()" from an external job instead.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'refresh_fleet_efficiency',
+            '*/5 * * * *',
+            'SELECT fn_refresh_fleet_efficiency()'
+        );
+    END IF;
+END;
+$$;
+
+COMMIT;
@@ -0,0 +1,23 @@
+-- Rollback: Remove mv_fleet_efficiency materialized view
+-- Purpose: Revert changes from 005_add_fleet_efficiency_view.sql
+--          (restore the t_vehicle aggregate in GET_FLEET_EFFICIENCY first)
+-- Author: Allocation-v2
+-- Date: 2026-10-16
+
+BEGIN;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.unschedule(jobid)
+        FROM cron.job
+        WHERE jobname = 'refresh_fleet_efficiency';
+    END IF;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS fn_refresh_fleet_efficiency();
+
+DROP MATERIALIZED VIEW IF EXISTS mv_fleet_efficiency;
+
+COMMIT;
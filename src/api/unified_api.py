@@ -9,6 +9,7 @@ from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel, Field, validator
 
 from src.controllers.unified_controller import UnifiedController
+from src.database.connection import db
 from src.integrations.microlise import MicroLiseClient, MicroLiseParams
 from src.optimizer.unified_optimizer import OptimizationConfig, OptimizationResult
 from src.utils.logging_config import logger
@@ -157,6 +158,12 @@ app = FastAPI(
 )
 
 
+@app.on_event("shutdown")
+def close_database_pool() -> None:
+    """Connections are pooled across requests; release them on shutdown."""
+    db.close()
+
+
 @app.post("/optimize/unified", response_model=Dict[str, Any], summary="Run unified optimization")
 def run_unified_optimization(body: UnifiedOptimizationRequest) -> Dict[str, Any]:
     config = _build_config_from_request(body)
@@ -178,8 +185,6 @@ def run_unified_optimization(body: UnifiedOptimizationRequest) -> Dict[str, Any]
         raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
-    finally:
-        controller.close()
 
     response: Dict[str, Any] = {
         "success": True,
@@ -248,8 +253,6 @@ def get_schedule_report(
         return report.to_dict()
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
-    finally:
-        controller.close()
 
 
 @app.get("/health")
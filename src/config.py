@@ -13,6 +13,20 @@ DB_CONFIG = {
     'host': os.getenv('psgrsql_db_host'),
     'port': os.getenv('psgrsql_db_port', '5432')
 }
+# Lifetime of in-process caches for read-mostly data (prices, fleet efficiency);
+# 0 disables caching
+DB_READ_CACHE_TTL_SECONDS = float(os.getenv('DB_READ_CACHE_TTL_SECONDS', '300'))
+# Connection pool bounds (shared by all controllers in the process)
+DB_POOL_MIN_CONNECTIONS = int(os.getenv('DB_POOL_MIN_CONNECTIONS', '1'))
+DB_POOL_MAX_CONNECTIONS = int(os.getenv('DB_POOL_MAX_CONNECTIONS', '16'))
+# Seconds a thread waits for a free pooled connection before PoolError
+DB_POOL_CHECKOUT_TIMEOUT_SECONDS = float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT_SECONDS', '30'))
+# Rows per multi-row INSERT statement when persisting in bulk
+DB_BULK_INSERT_PAGE_SIZE = int(os.getenv('DB_BULK_INSERT_PAGE_SIZE', '1000'))
+# Above this many ids, id-list lookups join a temp table instead of using = ANY(%s)
+DB_ANY_ARRAY_MAX_ELEMENTS = int(os.getenv('DB_ANY_ARRAY_MAX_ELEMENTS', '500'))
+# Above this many rows, bulk persists switch from multi-row INSERT to COPY FROM STDIN
+DB_BULK_COPY_THRESHOLD_ROWS = int(os.getenv('DB_BULK_COPY_THRESHOLD_ROWS', '5000'))
 
 # Hexaly Cloud Configuration
 # Import here to avoid circular dependency with logging
@@ -120,10 +134,22 @@ DEFAULT_P_FIXED_KW = 50.0
 # Charge scheduling grid: 30-minute slots, 48 per charger (24 h)
 CHARGE_SLOT_MINUTES = 30
 CHARGE_SLOTS_PER_CHARGER = 48
+# Persist the full 48-slot profile per vehicle, including 0 kW slots. Set
+# CHARGE_SCHEDULE_PERSIST_ZERO_SLOTS=false to write only slots with charge power
+# (readers must then treat a missing slot as 0 kW).
+CHARGE_SCHEDULE_PERSIST_ZERO_SLOTS = (
+    os.getenv("CHARGE_SCHEDULE_PERSIST_ZERO_SLOTS", "true").lower() == "true"
+)
 
 UNIFIED_ALLOCATION_TIME_LIMIT = 30
 UNIFIED_SCHEDULING_TIME_LIMIT = 300
 UNIFIED_INTEGRATED_TIME_LIMIT = 330
+# Hexaly worker threads for the unified model (0 = solver default)
+UNIFIED_SOLVER_THREADS = int(os.getenv('UNIFIED_SOLVER_THREADS', '0'))
+# Stop the unified solve early once the objective has not improved by more than
+# UNIFIED_STALL_RELATIVE_GAP for this many seconds (0 = always run to time limit)
+UNIFIED_STALL_TIME_LIMIT = int(os.getenv('UNIFIED_STALL_TIME_LIMIT', '0'))
+UNIFIED_STALL_RELATIVE_GAP = float(os.getenv('UNIFIED_STALL_RELATIVE_GAP', '0.001'))
 
 # Path for optimizer debug CSV export; set to empty string to disable
 UNIFIED_OPTIMIZER_DEBUG_CSV = os.getenv(
@@ -1,4 +1,5 @@
 """Constraint manager for coordinating all constraints."""
+import logging
 from typing import List, Dict
 from src.constraints.base import BaseConstraint
 from src.constraints.energy_feasibility import EnergyFeasibilityConstraint
@@ -44,7 +45,7 @@ class ConstraintManager:
             self.constraints.append(constraint)
             
             if constraint.enabled:
-                logger.info(f"Initialized constraint: {constraint}")
+                logger.info("Initialized constraint: %s", constraint)
     
     def evaluate_sequence(self, vehicle: Vehicle, route_sequence: List[Route], **kwargs) -> Dict:
         """
@@ -62,8 +63,11 @@ class ConstraintManager:
         breakdown = {}
         is_feasible = True
         
-        route_ids = [r.route_id for r in route_sequence]
-        logger.debug(f"Evaluating vehicle {vehicle.vehicle_id} with {len(route_sequence)} routes: {route_ids}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Evaluating vehicle %s with %s routes: %s",
+                vehicle.vehicle_id, len(route_sequence), [r.route_id for r in route_sequence],
+            )
         
         for constraint in self.constraints:
             if not constraint.enabled:
@@ -75,20 +79,20 @@ class ConstraintManager:
             breakdown[constraint_name] = cost
             total_cost += cost
             
-            logger.debug(f"  {constraint_name}: cost={cost:.2f}, hard={constraint.is_hard_constraint()}")
+            logger.debug("  %s: cost=%.2f, hard=%s", constraint_name, cost, constraint.is_hard_constraint())
             
             # Check if hard constraint violated
             if constraint.is_hard_constraint() and cost < 0:
                 is_feasible = False
-                logger.debug(f"  ✗ Hard constraint violated: {constraint_name} for vehicle {vehicle.vehicle_id}, penalty={cost}")
-                logger.debug(f"Vehicle {vehicle.vehicle_id} sequence evaluation: total_cost={total_cost:.2f}, feasible={is_feasible}")
+                logger.debug("  ✗ Hard constraint violated: %s for vehicle %s, penalty=%s", constraint_name, vehicle.vehicle_id, cost)
+                logger.debug("Vehicle %s sequence evaluation: total_cost=%.2f, feasible=%s", vehicle.vehicle_id, total_cost, is_feasible)
                 return {
                     'total_cost': total_cost,
                     'breakdown': breakdown,
                     'is_feasible': is_feasible
                 }
         
-        logger.debug(f"Vehicle {vehicle.vehicle_id} sequence evaluation: total_cost={total_cost:.2f}, feasible={is_feasible}")
+        logger.debug("Vehicle %s sequence evaluation: total_cost=%.2f, feasible=%s", vehicle.vehicle_id, total_cost, is_feasible)
         return {
             'total_cost': total_cost,
             'breakdown': breakdown,
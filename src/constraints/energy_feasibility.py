@@ -27,40 +27,36 @@ class EnergyFeasibilityConstraint(BaseConstraint):
         
         safety_margin_kwh = self.params.get('safety_margin_kwh', 5.0)
         allow_dc_charging = self.params.get('allow_dc_charging', True)
+        battery_capacity = vehicle.battery_capacity
         
         # Start with current vehicle energy
-        current_energy = vehicle.available_energy_kwh or vehicle.battery_capacity
+        current_energy = vehicle.available_energy_kwh or battery_capacity
         
-        logger.debug(f"    Energy check: start={current_energy:.1f} kWh, safety_margin={safety_margin_kwh} kWh")
+        logger.debug("    Energy check: start=%.1f kWh, safety_margin=%s kWh", current_energy, safety_margin_kwh)
 
         if current_energy < 0:
-            logger.error(f"Vehicle {vehicle.vehicle_id} has negative energy: {current_energy:.1f} kWh")
+            logger.error("Vehicle %s has negative energy: %.1f kWh", vehicle.vehicle_id, current_energy)
             return self.penalty
         
+        # Charge power is the same for every gap in the sequence; look it up on
+        # the first gap that needs it
+        charge_power = None
+        
         # Add charging between now and start of first route (continuous time)
         first_route = route_sequence[0]
         charge_start = vehicle.available_time
         if charge_start is not None:
             time_before_first = (first_route.plan_start_date_time - charge_start).total_seconds() / 3600.0
-            time_before_first = max(0.0, time_before_first)
             if time_before_first > 0:
-                charger_max_power = None
-                site_chargers = kwargs.get("site_chargers") or []
-                if vehicle.current_charger_id is not None and site_chargers:
-                    for ch in site_chargers:
-                        if ch.get("charger_id") == vehicle.current_charger_id:
-                            charger_max_power = ch.get("max_power")
-                            break
-                charge_power = vehicle.get_charge_power(
-                    use_dc=allow_dc_charging, charger_max_power=charger_max_power
-                )
+                charge_power = self._charge_power(vehicle, allow_dc_charging, kwargs.get("site_chargers"))
                 potential_charge = time_before_first * charge_power
-                current_energy = min(current_energy + potential_charge, vehicle.battery_capacity)
+                current_energy = min(current_energy + potential_charge, battery_capacity)
         
-        for route in route_sequence:
+        last_index = len(route_sequence) - 1
+        for index, route in enumerate(route_sequence):
             # Calculate energy required for this route
             required_energy = vehicle.calculate_energy_required(route.plan_mileage)
-            logger.debug(f"      Route {route.route_id}: need {required_energy:.1f} kWh, have {current_energy:.1f} kWh")
+            logger.debug("      Route %s: need %.1f kWh, have %.1f kWh", route.route_id, required_energy, current_energy)
             
             # Check if we have enough energy (with safety margin)
             if current_energy < (required_energy + safety_margin_kwh):
@@ -70,27 +66,30 @@ class EnergyFeasibilityConstraint(BaseConstraint):
             current_energy -= required_energy
             
             # Add charging between routes if time available
-            if route != route_sequence[-1]:
-                next_route = route_sequence[route_sequence.index(route) + 1]
+            if index < last_index:
+                next_route = route_sequence[index + 1]
                 time_between = (next_route.plan_start_date_time - route.plan_end_date_time).total_seconds() / 3600.0
                 
                 # Calculate potential charging (min of vehicle rate and charger max_power)
                 if time_between > 0:
-                    charger_max_power = None
-                    site_chargers = kwargs.get("site_chargers") or []
-                    if vehicle.current_charger_id is not None and site_chargers:
-                        for ch in site_chargers:
-                            if ch.get("charger_id") == vehicle.current_charger_id:
-                                charger_max_power = ch.get("max_power")
-                                break
-                    charge_power = vehicle.get_charge_power(
-                        use_dc=allow_dc_charging, charger_max_power=charger_max_power
-                    )
+                    if charge_power is None:
+                        charge_power = self._charge_power(vehicle, allow_dc_charging, kwargs.get("site_chargers"))
                     potential_charge = time_between * charge_power
-                    current_energy = min(current_energy + potential_charge, vehicle.battery_capacity)
+                    current_energy = min(current_energy + potential_charge, battery_capacity)
         
         return 0.0
     
+    @staticmethod
+    def _charge_power(vehicle: Vehicle, allow_dc_charging: bool, site_chargers) -> float:
+        """Vehicle charge power, capped by its current charger's max power when known."""
+        charger_max_power = None
+        if vehicle.current_charger_id is not None and site_chargers:
+            for ch in site_chargers:
+                if ch.get("charger_id") == vehicle.current_charger_id:
+                    charger_max_power = ch.get("max_power")
+                    break
+        return vehicle.get_charge_power(use_dc=allow_dc_charging, charger_max_power=charger_max_power)
+    
     def is_hard_constraint(self) -> bool:
         """Energy feasibility is a hard constraint."""
         return True
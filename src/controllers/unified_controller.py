@@ -1,14 +1,24 @@
 """Unified controller — route allocation and charge scheduling."""
 
+from bisect import bisect_left
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Union
+from itertools import groupby
+from operator import attrgetter
+from typing import DefaultDict, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 from src.config import (
     APPLICATION_NAME,
     DEFAULT_ALLOCATION_WINDOW_HOURS,
     DEFAULT_MAX_ROUTES_PER_VEHICLE,
+    CHARGE_SCHEDULE_PERSIST_ZERO_SLOTS,
     CHARGE_SLOT_MINUTES,
     CHARGE_SLOTS_PER_CHARGER,
+    DB_BULK_COPY_THRESHOLD_ROWS,
+    DB_READ_CACHE_TTL_SECONDS,
     DEFAULT_P_FIXED_KW,
     DEFAULT_ROUTE_ENERGY_SAFETY_MARGIN_KWH,
     DEFAULT_TARGET_SOC_PERCENT,
@@ -20,7 +30,7 @@ from src.config import (
 from src.constraints.constraint_manager import ConstraintManager
 from src.constraints.energy_feasibility import EnergyFeasibilityConstraint
 from src.database.connection import db
-from src.database.queries import Queries
+from src.database.queries import PreparedQueries, Queries
 from src.maf.parameter_parser import (
     get_all_constraint_configs,
     get_site_parameter,
@@ -53,8 +63,24 @@ from src.optimizer.unified_optimizer import (
     UnifiedOptimizer,
     normalize_mode,
 )
+from src.utils.cache import TTLCache
 from src.utils.logging_config import logger
 
+# Rows per server round-trip when streaming a persisted charge schedule.
+CHARGE_SCHEDULE_STREAM_ITERSIZE = 2000
+# Concurrent independent reads issued by get_schedule_report.
+REPORT_FETCH_WORKERS = 4
+# Concurrent site lookups (chargers, prices, forecast, ASC) before a scheduling solve.
+SCHEDULING_FETCH_WORKERS = 4
+
+# Prices and fleet efficiency change at most hourly; share them across runs.
+_PRICE_CACHE = TTLCache(maxsize=16, ttl_seconds=DB_READ_CACHE_TTL_SECONDS)
+_FLEET_EFFICIENCY_CACHE = TTLCache(maxsize=64, ttl_seconds=DB_READ_CACHE_TTL_SECONDS)
+# Site chargers are near-static; scheduler rows are invalidated on status writes
+# and only read through the cache on the run path (reports read status live).
+_SITE_CHARGERS_CACHE = TTLCache(maxsize=64, ttl_seconds=DB_READ_CACHE_TTL_SECONDS)
+_SCHEDULER_CONFIG_CACHE = TTLCache(maxsize=128, ttl_seconds=DB_READ_CACHE_TTL_SECONDS)
+
 
 class UnifiedController:
     """Orchestrates MAF config, optimization by mode, and persistence."""
@@ -72,6 +98,9 @@ class UnifiedController:
         self.site_config: Optional[dict] = None
         self.constraint_manager: Optional[ConstraintManager] = None
         self.fleet_avg_efficiency: float = 0.35
+        self._time_slots_cache: Optional[Tuple[datetime, Tuple[datetime, ...]]] = None
+        # (max_forecast_time, max_price_time), loaded with the MAF config
+        self._data_horizons: Optional[Tuple[Optional[datetime], Optional[datetime]]] = None
 
         db.connect()
 
@@ -127,15 +156,9 @@ class UnifiedController:
             )
 
             vehicles = self._load_vehicles(current_time)
-            vehicles = [
-                v
-                for v in vehicles
-                if getattr(v, "estimated_soc", None) is None
-                or float(v.estimated_soc) != -111
-            ]
             logger.info("Loaded %s vehicles after VOR filter", len(vehicles))
 
-            routes = self._load_routes(window_start, window_end)
+            routes, route_allocations = self._load_routes(window_start, window_end)
             logger.info("Loaded %s routes", len(routes))
 
             constraint_configs = get_all_constraint_configs(self.site_id, self.site_config)
@@ -153,6 +176,7 @@ class UnifiedController:
             solver_result: Optional[
                 Union[RouteAllocationSolverResult, OptimizationResult]
             ] = None
+            time_slots: Optional[Sequence[datetime]] = None
 
             if allocation_only:
                 builder = AllocationDataBuilder(
@@ -182,21 +206,29 @@ class UnifiedController:
             else:
                 time_slots = self._build_time_slots(window_start)
                 charge_horizon_end = self._charge_horizon_end(window_start)
-                n_chargers, charger_max_kw, charger_ids = self._load_site_chargers()
-                price_data = self._load_price_data(window_start, charge_horizon_end)
-                forecast_data = self._load_forecast_data(window_start, charge_horizon_end)
-                capacity_kw = self._build_capacity_per_slot(
-                    time_slots, forecast_data
-                )
-                electricity_cost = self._build_electricity_cost_per_slot(
-                    time_slots, price_data
-                )
+                # Site chargers, prices, forecast and ASC are independent
+                # lookups; issue them together on pooled connections.
+                with ThreadPoolExecutor(max_workers=SCHEDULING_FETCH_WORKERS) as executor:
+                    chargers_future = executor.submit(self._load_site_chargers)
+                    price_future = executor.submit(
+                        self._load_price_data, time_slots, window_start, charge_horizon_end
+                    )
+                    forecast_future = executor.submit(
+                        self._load_forecast_data, time_slots, window_start, charge_horizon_end
+                    )
+                    site_kw_future = executor.submit(self._load_site_asc_kw)
+                    n_chargers, charger_max_kw, charger_ids = chargers_future.result()
+                    price_data = price_future.result()
+                    forecast_data = forecast_future.result()
+                    site_kw = site_kw_future.result()
+                capacity_kw = self._build_capacity_per_slot(forecast_data, site_kw)
+                electricity_cost = self._build_electricity_cost_per_slot(price_data)
                 p_fixed = p_fixed_kw or DEFAULT_P_FIXED_KW
 
                 mandatory_nodes = {}
                 if run_scheduling and not run_allocation:
                     mandatory_nodes = self._mandatory_nodes_from_allocations(
-                        vehicles, routes, window_start, window_end
+                        vehicles, routes, route_allocations
                     )
 
                 builder = ModelDataBuilder(
@@ -277,7 +309,7 @@ class UnifiedController:
                     self._update_allocation_monitor(allocation_result)
 
                 if schedule_result and self.schedule_id:
-                    self._persist_schedule(schedule_result)
+                    self._persist_schedule(schedule_result, time_slots)
                     self._update_scheduler_status("completed")
 
             return allocation_result, schedule_result, solver_result
@@ -365,8 +397,9 @@ class UnifiedController:
         return config
 
     def _floor_to_30_min(self, dt: datetime) -> datetime:
-        minute = (dt.minute // 30) * 30
-        return dt.replace(minute=minute, second=0, microsecond=0)
+        return dt - timedelta(
+            minutes=dt.minute % 30, seconds=dt.second, microseconds=dt.microsecond
+        )
 
     def _initialize_optimization(
         self,
@@ -401,12 +434,7 @@ class UnifiedController:
 
     def _initialize_scheduler(self):
         if self.schedule_id:
-            rows = db.execute_query(
-                Queries.GET_SCHEDULER_CONFIG,
-                (self.schedule_id,),
-                fetch=True,
-            )
-            if not rows:
+            if self._get_scheduler_config(self.schedule_id) is None:
                 raise ValueError(f"Schedule ID {self.schedule_id} not found")
             logger.info("Loaded scheduler config: schedule_id=%s", self.schedule_id)
             return
@@ -417,15 +445,12 @@ class UnifiedController:
             fetch=True,
         )
         self.schedule_id = result[0]["schedule_id"]
+        _SCHEDULER_CONFIG_CACHE.set(self.schedule_id, result[0])
         logger.info("Created scheduler config: schedule_id=%s", self.schedule_id)
 
     def _load_site_chargers(self) -> Tuple[int, List[float], List[int]]:
         """Return (count, max_power_kw per charger index, charger_ids)."""
-        rows = db.execute_query(
-            Queries.GET_SITE_CHARGERS,
-            (self.site_id,),
-            fetch=True,
-        )
+        rows = self._get_site_chargers(self.site_id)
         if not rows:
             logger.info("Site %s: no chargers in DB, using 1 default", self.site_id)
             return 1, [DEFAULT_P_FIXED_KW], [1]
@@ -440,159 +465,263 @@ class UnifiedController:
         )
         return len(rows), powers, ids
 
-    def _build_time_slots(self, start: datetime) -> List[datetime]:
-        """Exactly 48 half-hour slots (24 h) per charger from floored start time."""
-        return [
-            start + timedelta(minutes=CHARGE_SLOT_MINUTES * i)
-            for i in range(CHARGE_SLOTS_PER_CHARGER)
-        ]
+    @staticmethod
+    def _get_site_chargers(site_id: int) -> Tuple[dict, ...]:
+        """Active charger rows for a site (cached; treat rows as read-only)."""
+        return _SITE_CHARGERS_CACHE.get_or_load(
+            site_id,
+            lambda: tuple(
+                db.execute_query(Queries.GET_SITE_CHARGERS, (site_id,), fetch=True) or ()
+            ),
+        )
+
+    @staticmethod
+    def _get_scheduler_config(schedule_id: int) -> Optional[dict]:
+        """t_scheduler row for a schedule, or None (cached only when found).
+
+        Run path only: status written by other processes is not seen until the
+        entry expires. Readers that report status use _fetch_scheduler_config.
+        """
+        row = _SCHEDULER_CONFIG_CACHE.get(schedule_id)
+        if row is None:
+            row = UnifiedController._fetch_scheduler_config(schedule_id)
+            if row is not None:
+                _SCHEDULER_CONFIG_CACHE.set(schedule_id, row)
+        return row
+
+    @staticmethod
+    def _fetch_scheduler_config(schedule_id: int) -> Optional[dict]:
+        """Current t_scheduler row for a schedule from the database, or None."""
+        rows = db.execute_prepared(
+            PreparedQueries.GET_SCHEDULER_CONFIG, (schedule_id,), fetch=True
+        )
+        return rows[0] if rows else None
+
+    def _build_time_slots(self, start: datetime) -> Tuple[datetime, ...]:
+        """Exactly 48 half-hour slots (24 h) per charger from floored start time.
+
+        The result is cached per start time and shared between the optimizer
+        inputs and persistence, so it is returned as an immutable tuple.
+        """
+        if self._time_slots_cache is not None and self._time_slots_cache[0] == start:
+            return self._time_slots_cache[1]
+        step = timedelta(minutes=CHARGE_SLOT_MINUTES)
+        slots = tuple(start + step * i for i in range(CHARGE_SLOTS_PER_CHARGER))
+        self._time_slots_cache = (start, slots)
+        return slots
 
     def _charge_horizon_end(self, start: datetime) -> datetime:
         return start + timedelta(
             minutes=CHARGE_SLOT_MINUTES * CHARGE_SLOTS_PER_CHARGER
         )
 
+    @staticmethod
+    def _slot_positions(
+        time_slots: Sequence[datetime], times: Sequence[datetime]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Map ``times`` onto the regular slot grid ``time_slots``.
+
+        Returns (row positions, slot indices) for the times that fall exactly
+        on a slot; others are dropped.
+        """
+        n_slots = len(time_slots)
+        if not n_slots or not times:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        origin = time_slots[0]
+        step_seconds = CHARGE_SLOT_MINUTES * 60
+        offsets = np.fromiter(
+            ((t - origin).total_seconds() for t in times),
+            dtype=np.float64,
+            count=len(times),
+        )
+        slot_idx = (offsets // step_seconds).astype(np.intp)
+        on_grid = (offsets % step_seconds == 0) & (slot_idx >= 0) & (slot_idx < n_slots)
+        return np.flatnonzero(on_grid), slot_idx[on_grid]
+
     def _load_forecast_data(
-        self, start: datetime, end: datetime
-    ) -> Dict[datetime, float]:
-        rows = db.execute_query(
-            Queries.GET_FORECAST_DATA,
-            (self.site_id, start, end),
-            fetch=True,
+        self, time_slots: Sequence[datetime], start: datetime, end: datetime
+    ) -> np.ndarray:
+        """Forecast consumption (kW) aligned to ``time_slots``; 0.0 where missing."""
+        # Tuple rows (time, kW as float8), columns split straight into arrays.
+        rows = list(
+            db.stream_query(
+                Queries.GET_FORECAST_DATA, (self.site_id, start, end), dict_cursor=False
+            )
         )
-        return {
-            row["forecasted_date_time"]: float(row["forecasted_consumption"])
-            for row in (rows or [])
-        }
+        forecast = np.zeros(len(time_slots), dtype=np.float64)
+        if rows:
+            times, values = zip(*rows)
+            row_pos, slot_idx = self._slot_positions(time_slots, times)
+            kw = np.array(values, dtype=np.float64)
+            # Rows are time-ordered, so later duplicates win as before.
+            forecast[slot_idx] = np.nan_to_num(kw[row_pos])
+        return forecast
 
     def _load_price_data(
-        self, start: datetime, end: datetime
-    ) -> Dict[datetime, Tuple[float, bool]]:
-        rows = db.execute_query(
-            Queries.GET_PRICE_DATA,
-            (start, end),
-            fetch=True,
+        self, time_slots: Sequence[datetime], start: datetime, end: datetime
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Fixed price and triad flag aligned to ``time_slots``; (0.0, False) where missing."""
+        times, price_values, triad_values = _PRICE_CACHE.get_or_load(
+            (start, end), lambda: self._fetch_price_rows(start, end)
         )
-        return {
-            row["date_time"]: (float(row["electricty_price_fixed"] or 0), bool(row["triad"]))
-            for row in (rows or [])
-        }
+        prices = np.zeros(len(time_slots), dtype=np.float64)
+        triads = np.zeros(len(time_slots), dtype=bool)
+        row_pos, slot_idx = self._slot_positions(time_slots, times)
+        prices[slot_idx] = price_values[row_pos]
+        triads[slot_idx] = triad_values[row_pos]
+        return prices, triads
+
+    @staticmethod
+    def _fetch_price_rows(
+        start: datetime, end: datetime
+    ) -> Tuple[Tuple[datetime, ...], np.ndarray, np.ndarray]:
+        """Price rows as (times, fixed price array, triad flag array)."""
+        rows = list(db.stream_query(Queries.GET_PRICE_DATA, (start, end), dict_cursor=False))
+        if not rows:
+            return (), np.empty(0, dtype=np.float64), np.empty(0, dtype=bool)
+        times, price_values, triad_values = zip(*rows)
+        prices = np.nan_to_num(np.array(price_values, dtype=np.float64))
+        triads = np.array([bool(t) for t in triad_values], dtype=bool)
+        return times, prices, triads
+
+    def _load_site_asc_kw(self) -> float:
+        """Site authorised supply capacity (kW); 500 kW when not configured."""
+        asc_rows = db.execute_query(Queries.GET_SITE_ASC, (self.site_id,), fetch=True)
+        if asc_rows and asc_rows[0].get("ASC"):
+            return float(asc_rows[0]["ASC"])
+        return 500.0
 
     def _build_capacity_per_slot(
-        self, time_slots: List[datetime], forecast_data: Dict[datetime, float]
+        self, forecast_kw: np.ndarray, site_kw: float
     ) -> List[float]:
-        asc_rows = db.execute_query(Queries.GET_SITE_ASC, (self.site_id,), fetch=True)
-        site_kw = 500.0
-        if asc_rows and asc_rows[0].get("ASC"):
-            site_kw = float(asc_rows[0]["ASC"])
-        capacity = []
-        for slot in time_slots:
-            forecast_kw = forecast_data.get(slot, 0.0)
-            capacity.append(max(site_kw - forecast_kw, 0.0))
-        return capacity
+        return np.maximum(site_kw - forecast_kw, 0.0).tolist()
 
     def _build_electricity_cost_per_slot(
-        self,
-        time_slots: List[datetime],
-        price_data: Dict[datetime, Tuple[float, bool]],
+        self, price_data: Tuple[np.ndarray, np.ndarray]
     ) -> List[float]:
         """Negative prizes for charge nodes (minimize electricity cost)."""
-        costs = []
-        for slot in time_slots:
-            price, _triad = price_data.get(slot, (0.0, False))
-            costs.append(-float(price))
-        return costs
+        prices, _triads = price_data
+        return (-prices).tolist()
 
     def _mandatory_nodes_from_allocations(
         self,
         vehicles: List[Vehicle],
         routes: List[Route],
-        window_start: datetime,
-        window_end: datetime,
+        route_allocations: Dict[str, int],
     ) -> Dict[int, set]:
         """Fix pre-allocated routes when running charge_scheduling only."""
         route_id_to_idx = {r.route_id: idx for idx, r in enumerate(routes)}
         mandatory: Dict[int, set] = {v_idx: set() for v_idx in range(len(vehicles))}
         vehicle_id_to_idx = {v.vehicle_id: idx for idx, v in enumerate(vehicles)}
 
-        for vehicle in vehicles:
-            rows = db.execute_query(
-                Queries.GET_ROUTES_FOR_SCHEDULING_ALLOCATED,
-                (vehicle.vehicle_id, window_start, window_end),
-                fetch=True,
-            )
-            v_idx = vehicle_id_to_idx.get(vehicle.vehicle_id)
-            if v_idx is None:
-                continue
-            for row in rows or []:
-                r_idx = route_id_to_idx.get(row["route_id"])
-                if r_idx is not None:
-                    mandatory[v_idx].add(r_idx)
+        for route_id, vehicle_id in route_allocations.items():
+            v_idx = vehicle_id_to_idx.get(vehicle_id)
+            r_idx = route_id_to_idx.get(route_id)
+            if v_idx is not None and r_idx is not None:
+                mandatory[v_idx].add(r_idx)
 
         return mandatory
 
-    def _persist_schedule(self, result: ChargeScheduleResult):
-        all_time_slots = self._build_time_slots(result.planning_start)
+    def _persist_schedule(
+        self,
+        result: ChargeScheduleResult,
+        time_slots: Optional[Sequence[datetime]] = None,
+    ):
+        all_time_slots = (
+            time_slots
+            if time_slots is not None
+            else self._build_time_slots(result.planning_start)
+        )
         if len(all_time_slots) != CHARGE_SLOTS_PER_CHARGER:
             raise ValueError(
                 f"Expected {CHARGE_SLOTS_PER_CHARGER} charge slots, got {len(all_time_slots)}"
             )
-        db.execute_query(
-            Queries.DELETE_CHARGE_SCHEDULE_BY_SCHEDULE_ID,
-            (self.schedule_id,),
-            fetch=False,
-        )
-        total_inserted = 0
+        # Loop invariants: one timestamp per persist, ids/connector per vehicle.
+        schedule_id = self.schedule_id
+        created_at = datetime.now()
+        slot_index = {slot_time: idx for idx, slot_time in enumerate(all_time_slots)}
+        n_slots = len(all_time_slots)
+        all_slot_idx = np.arange(n_slots)
+        # Column-oriented buffers; sent as one array parameter per column.
+        vehicle_ids: List[int] = []
+        slot_times: List[datetime] = []
+        charge_powers: List[float] = []
+        connector_ids: List[str] = []
+        charger_powers: List[Optional[float]] = []
         for vehicle_schedule in result.vehicle_schedules:
-            slot_power_map = {
-                slot.time_slot: slot.charge_power_kw
-                for slot in vehicle_schedule.charge_slots
-            }
+            powers = np.zeros(n_slots, dtype=np.float64)
+            for slot in vehicle_schedule.charge_slots:
+                idx = slot_index.get(slot.time_slot)
+                if idx is not None:
+                    powers[idx] = slot.charge_power_kw
             connector_id = (
                 str(vehicle_schedule.assigned_charger_id)
                 if vehicle_schedule.assigned_charger_id is not None
                 else "1"
             )
-            for slot_time in all_time_slots:
-                charge_power = slot_power_map.get(slot_time, 0.0)
-                db.execute_query(
-                    Queries.INSERT_CHARGE_SCHEDULE,
-                    (
-                        self.schedule_id,
-                        vehicle_schedule.vehicle_id,
-                        slot_time,
-                        charge_power,
-                        None,
-                        True,
-                        connector_id,
-                        datetime.now(),
-                        250,
-                        None,
-                        vehicle_schedule.assigned_charger_power_kw,
-                    ),
-                    fetch=False,
+            keep = all_slot_idx if CHARGE_SCHEDULE_PERSIST_ZERO_SLOTS else np.flatnonzero(powers)
+            n_keep = len(keep)
+            vehicle_ids.extend([vehicle_schedule.vehicle_id] * n_keep)
+            slot_times.extend(all_time_slots[i] for i in keep.tolist())
+            charge_powers.extend(powers[keep].tolist())
+            connector_ids.extend([connector_id] * n_keep)
+            charger_powers.extend([vehicle_schedule.assigned_charger_power_kw] * n_keep)
+
+        total_inserted = len(vehicle_ids)
+        with db.get_cursor() as cur:
+            if total_inserted > DB_BULK_COPY_THRESHOLD_ROWS:
+                # COPY cannot upsert: replace the schedule wholesale.
+                cur.execute(Queries.DELETE_CHARGE_SCHEDULE_BY_SCHEDULE_ID, (schedule_id,))
+                rows = [
+                    (schedule_id, vid, t, p, None, True, cid, created_at, 250, None, kw)
+                    for vid, t, p, cid, kw in zip(
+                        vehicle_ids, slot_times, charge_powers, connector_ids, charger_powers
+                    )
+                ]
+                db.copy_rows_bulk(Queries.COPY_CHARGE_SCHEDULE, rows, cursor=cur)
+            else:
+                # Upsert in place so unchanged slots keep their row versions.
+                cur.execute(
+                    Queries.DELETE_CHARGE_SCHEDULE_OBSOLETE_SLOTS,
+                    (schedule_id, vehicle_ids, slot_times),
                 )
-                total_inserted += 1
+                if total_inserted:
+                    cur.execute(
+                        Queries.UPSERT_CHARGE_SCHEDULE_UNNEST,
+                        (
+                            schedule_id, None, True, created_at, 250, None,
+                            vehicle_ids, slot_times, charge_powers, connector_ids,
+                            charger_powers,
+                        ),
+                    )
         logger.info("Persisted %s charge schedule rows", total_inserted)
 
     def _update_scheduler_status(self, status: str):
         if not self.schedule_id:
             return
-        db.execute_query(
-            Queries.UPDATE_SCHEDULER_STATUS,
+        rows = db.execute_prepared(
+            PreparedQueries.UPDATE_SCHEDULER_STATUS,
             (status, self.schedule_id),
-            fetch=False,
+            fetch=True,
         )
+        if rows:
+            _SCHEDULER_CONFIG_CACHE.set(self.schedule_id, rows[0])
+        else:
+            _SCHEDULER_CONFIG_CACHE.invalidate(self.schedule_id)
 
     def _load_maf_configuration(self):
         logger.info("Loading MAF configuration for %s", APPLICATION_NAME)
         try:
             result = db.execute_query(
-                Queries.CALL_GET_MODULE_PARAMS,
-                (APPLICATION_NAME,),
+                Queries.GET_MODULE_PARAMS_WITH_HORIZONS,
+                (APPLICATION_NAME, self.site_id),
                 fetch=True,
             )
             if result:
+                self._data_horizons = (
+                    result[0].get("max_forecast_time"),
+                    result[0].get("max_price_time"),
+                )
                 json_params = result[0].get("sp_get_module_params")
                 site_configs = parse_maf_response(json_params)
                 self.site_config = site_configs.get(
@@ -628,14 +757,19 @@ class UnifiedController:
         planning_start = current_time
         planning_target_end = current_time + timedelta(hours=window_hours)
 
-        with db.get_cursor() as cur:
-            cur.execute(Queries.GET_FORECAST_HORIZON, (self.site_id,))
-            forecast_row = cur.fetchone()
-            max_forecast_time = forecast_row["max_forecast_time"] if forecast_row else None
+        if self._data_horizons is not None:
+            max_forecast_time, max_price_time = self._data_horizons
+        else:
+            with db.get_cursor() as cur:
+                cur.execute(Queries.GET_FORECAST_HORIZON, (self.site_id,))
+                forecast_row = cur.fetchone()
+                max_forecast_time = (
+                    forecast_row["max_forecast_time"] if forecast_row else None
+                )
 
-            cur.execute(Queries.GET_PRICE_HORIZON)
-            price_row = cur.fetchone()
-            max_price_time = price_row["max_price_time"] if price_row else None
+                cur.execute(Queries.GET_PRICE_HORIZON)
+                price_row = cur.fetchone()
+                max_price_time = price_row["max_price_time"] if price_row else None
 
         constraints = [planning_target_end]
         if max_forecast_time:
@@ -656,39 +790,57 @@ class UnifiedController:
         return planning_start, planning_end, actual_hours
 
     def _load_vehicles(self, as_of_time: Optional[datetime] = None) -> List[Vehicle]:
+        # VOR vehicles (latest VSM estimated_soc == -111) are excluded in SQL.
         rows = db.execute_query(
             Queries.GET_ACTIVE_VEHICLES,
-            (self.site_id,),
+            (self.site_id, as_of_time, as_of_time),
             fetch=True,
         )
         vehicles = []
-        enabled_vehicle_ids = self.site_config.get("enabled_vehicles", [])
+        enabled_vehicle_ids = frozenset(self.site_config.get("enabled_vehicles") or ())
 
         for row in rows:
             if enabled_vehicle_ids and row["vehicle_id"] not in enabled_vehicle_ids:
                 continue
-            vehicle = Vehicle(**row)
-            self._load_vehicle_state(vehicle, as_of_time)
-            vehicles.append(vehicle)
+            vehicles.append(Vehicle.from_row(row))
+
+        vsm_by_vehicle = self._load_vsm_rows(
+            [v.vehicle_id for v in vehicles], as_of_time
+        )
+        for vehicle in vehicles:
+            self._apply_vehicle_state(
+                vehicle, vsm_by_vehicle.get(vehicle.vehicle_id), as_of_time
+            )
         return vehicles
 
-    def _load_vehicle_state(self, vehicle: Vehicle, as_of_time: Optional[datetime] = None):
-        reference_time = as_of_time if as_of_time is not None else datetime.now()
+    def _load_vsm_rows(
+        self, vehicle_ids: List[int], as_of_time: Optional[datetime] = None
+    ) -> Dict[int, dict]:
+        """Latest VSM row per vehicle (as of ``as_of_time`` if given), one query."""
+        if not vehicle_ids:
+            return {}
         if as_of_time is not None:
-            vsm_data = db.execute_query(
-                Queries.GET_VSM_AS_OF,
-                (vehicle.vehicle_id, as_of_time),
+            rows = db.execute_query(
+                Queries.GET_VSM_AS_OF_BULK,
+                (vehicle_ids, as_of_time),
                 fetch=True,
             )
         else:
-            vsm_data = db.execute_query(
-                Queries.GET_LATEST_VSM,
-                (vehicle.vehicle_id,),
+            rows = db.execute_query(
+                Queries.GET_LATEST_VSM_BULK,
+                (vehicle_ids,),
                 fetch=True,
             )
+        return {row["vehicle_id"]: row for row in rows or []}
 
-        if vsm_data:
-            vsm = vsm_data[0]
+    def _apply_vehicle_state(
+        self,
+        vehicle: Vehicle,
+        vsm: Optional[dict],
+        as_of_time: Optional[datetime] = None,
+    ):
+        reference_time = as_of_time if as_of_time is not None else datetime.now()
+        if vsm:
             vehicle.current_status = vsm["status"]
             vehicle.current_route_id = vsm["route_id"]
             vehicle.estimated_soc = vsm["estimated_soc"]
@@ -704,13 +856,30 @@ class UnifiedController:
                 vehicle.available_time = as_of_time
             vehicle.available_energy_kwh = vehicle.get_available_energy(reference_time)
 
-    def _load_routes(self, window_start: datetime, window_end: datetime) -> List[Route]:
-        rows = db.execute_query(
-            Queries.GET_ROUTES_IN_WINDOW,
+    def _load_routes(
+        self, window_start: datetime, window_end: datetime
+    ) -> Tuple[List[Route], Dict[str, int]]:
+        """Routes in the window and their current allocations (route_id -> vehicle_id)."""
+        # Server-side cursor: routes are built while later rows are still
+        # arriving, and the raw result set is never held in full.
+        rows = db.stream_query(
+            Queries.GET_ROUTES_AND_ALLOCATIONS_IN_WINDOW,
             (self.site_id, window_start, window_end),
-            fetch=True,
+            dict_cursor=False,
         )
-        return [Route(**row) for row in rows]
+        routes: List[Route] = []
+        route_allocations: Dict[str, int] = {}
+        seen_route_ids = set()
+        for *route_columns, vehicle_id_allocated in rows:
+            route_id = route_columns[0]
+            # One row per route unless it has several allocation rows
+            if route_id in seen_route_ids:
+                continue
+            seen_route_ids.add(route_id)
+            routes.append(Route(*route_columns))
+            if vehicle_id_allocated is not None:
+                route_allocations[route_id] = vehicle_id_allocated
+        return routes, route_allocations
 
     def _load_vehicle_chargers(
         self, vehicles: List[Vehicle], reference_time: Optional[datetime] = None
@@ -728,11 +897,6 @@ class UnifiedController:
 
     def _persist_allocation(self, result: AllocationResult):
         logger.info("Persisting %s allocations", len(result.allocations))
-        db.execute_query(
-            Queries.DELETE_SITE_ALLOCATIONS,
-            (self.site_id,),
-            fetch=False,
-        )
         allocation_rows = []
         for alloc in result.allocations:
             row = (
@@ -748,9 +912,17 @@ class UnifiedController:
             )
             allocation_rows.append(row)
 
+        # Replace the site's allocations atomically.
+        with db.transaction():
+            db.execute_query(
+                Queries.DELETE_SITE_ALLOCATIONS,
+                (self.site_id,),
+                fetch=False,
+            )
+            db.execute_values_bulk(
+                Queries.INSERT_ROUTE_ALLOCATED_WITH_HISTORY_VALUES, allocation_rows
+            )
         if allocation_rows:
-            db.execute_many(Queries.INSERT_ROUTE_ALLOCATED, allocation_rows)
-            db.execute_many(Queries.INSERT_ROUTE_ALLOCATED_HISTORY, allocation_rows)
             logger.info("Persisted %s allocations", len(allocation_rows))
 
     def _update_allocation_monitor(self, result: AllocationResult):
@@ -772,28 +944,51 @@ class UnifiedController:
             result.total_score,
         )
 
+    @staticmethod
+    def _fetch_fleet_efficiency(site_id: int) -> Optional[float]:
+        eff_rows = db.execute_query(
+            Queries.GET_FLEET_EFFICIENCY, (site_id, site_id, site_id), fetch=True
+        )
+        if eff_rows and eff_rows[0].get("fleet_avg_efficiency") is not None:
+            return float(eff_rows[0]["fleet_avg_efficiency"])
+        return None
+
     def get_schedule_report(
         self, schedule_id: int, timestamp: datetime
     ) -> ScheduleReport:
         """Read-only schedule report from persisted charge schedule data."""
-        config_rows = db.execute_query(
-            Queries.GET_SCHEDULER_CONFIG,
-            (schedule_id,),
-            fetch=True,
-        )
-        if not config_rows:
+        # Uncached: the schedule may be finished by another process
+        row = self._fetch_scheduler_config(schedule_id)
+        if row is None:
             raise ValueError(f"Schedule ID {schedule_id} not found")
-        row = config_rows[0]
         site_id = row["device_id"]
         schedule_status = row.get("status")
 
-        charge_rows = db.execute_query(
-            Queries.GET_CHARGE_SCHEDULE_BY_SCHEDULE_ID,
-            (schedule_id,),
-            fetch=True,
-        )
+        slot_duration_hours = 0.5
+        vehicle_energy: Dict[int, float] = {}
+        vehicle_connector: Dict[int, int] = {}
+        vehicle_charger_power: Dict[int, float] = {}
+        planning_start: Optional[datetime] = None
+        last_slot_start: Optional[datetime] = None
 
-        if not charge_rows:
+        # Totals are reduced in the database: one row per vehicle, not per slot.
+        for summary in db.execute_query(
+            Queries.GET_CHARGE_SCHEDULE_VEHICLE_SUMMARY,
+            (slot_duration_hours, schedule_id),
+            fetch=True,
+        ) or []:
+            vid = summary["vehicle_id"]
+            vehicle_energy[vid] = float(summary["energy_kwh"] or 0)
+            if summary["connector_id"]:
+                vehicle_connector[vid] = int(summary["connector_id"])
+            if summary["assigned_charger_power_kw"]:
+                vehicle_charger_power[vid] = float(summary["assigned_charger_power_kw"])
+            if planning_start is None or summary["first_slot_start"] < planning_start:
+                planning_start = summary["first_slot_start"]
+            if last_slot_start is None or summary["last_slot_start"] > last_slot_start:
+                last_slot_start = summary["last_slot_start"]
+
+        if not vehicle_energy:
             return ScheduleReport(
                 schedule_id=schedule_id,
                 site_id=site_id,
@@ -802,106 +997,131 @@ class UnifiedController:
                 notes=["No charge data for this schedule."],
             )
 
-        slot_duration_hours = 0.5
-        all_slot_times = {r["charge_start_date_time"] for r in charge_rows}
-        planning_start = min(all_slot_times)
-        planning_end = max(all_slot_times) + timedelta(minutes=30)
-
-        vehicle_charge_slots: Dict[int, List[Tuple[datetime, float]]] = {}
-        vehicle_energy: Dict[int, float] = {}
-        vehicle_connector: Dict[int, int] = {}
-        vehicle_charger_power: Dict[int, float] = {}
-
-        for r in charge_rows:
-            vid = r["vehicle_id"]
-            t = r["charge_start_date_time"]
-            p = float(r["charge_power"] or 0)
-            connector_id = r.get("connector_id")
-            charger_power = r.get("assigned_charger_power_kw")
-
-            if vid not in vehicle_charge_slots:
-                vehicle_charge_slots[vid] = []
-                vehicle_energy[vid] = 0.0
-            vehicle_charge_slots[vid].append((t, p))
-            vehicle_energy[vid] += p * slot_duration_hours
-            if connector_id and vid not in vehicle_connector:
-                vehicle_connector[vid] = int(connector_id)
-            if charger_power and vid not in vehicle_charger_power:
-                vehicle_charger_power[vid] = float(charger_power)
+        planning_end = last_slot_start + timedelta(minutes=30)
+        report_vehicle_ids = sorted(vehicle_energy)
 
-        charger_power_map: Dict[int, float] = {}
-        if vehicle_connector:
-            charger_rows = db.execute_query(
-                Queries.GET_SITE_CHARGERS,
-                (site_id,),
-                fetch=True,
+        # The remaining lookups are independent reads; run them concurrently on
+        # pooled connections.
+        with ThreadPoolExecutor(max_workers=REPORT_FETCH_WORKERS) as executor:
+            routes_future = executor.submit(
+                db.execute_query,
+                Queries.GET_SCHEDULE_REPORT_ROUTES,
+                (
+                    site_id, planning_start, planning_end,
+                    site_id,
+                    site_id, planning_start, planning_end,
+                ),
+                True,
+            )
+            state_future = executor.submit(
+                db.execute_query,
+                Queries.GET_VEHICLE_CHARGE_STATE_AS_OF_FOR_SITE,
+                (timestamp, site_id),
+                True,
+            )
+            chargers_future = (
+                executor.submit(self._get_site_chargers, site_id)
+                if vehicle_connector
+                else None
             )
-            for r in charger_rows:
-                charger_power_map[r["charger_id"]] = float(r["max_power"] or 50.0)
+            efficiency_future = executor.submit(
+                _FLEET_EFFICIENCY_CACHE.get_or_load,
+                site_id,
+                lambda: self._fetch_fleet_efficiency(site_id),
+            )
+
+            charger_rows = chargers_future.result() if chargers_future is not None else None
+            report_route_rows = routes_future.result() or []
+            try:
+                site_eff = efficiency_future.result()
+            except Exception:
+                site_eff = None
+            state_rows = state_future.result() or []
 
         total_energy_scheduled_kwh = sum(vehicle_energy.values())
-        vehicles_scheduled = len(vehicle_charge_slots)
+        vehicles_scheduled = len(vehicle_energy)
 
-        allocated_route_rows = db.execute_query(
-            Queries.GET_ALLOCATED_ROUTES_IN_WINDOW,
-            (site_id, planning_start, planning_end),
-            fetch=True,
-        )
-        route_rows = db.execute_query(
-            Queries.GET_ROUTES_IN_WINDOW,
-            (site_id, planning_start, planning_end),
-            fetch=True,
+        routes_in_window = (
+            int(report_route_rows[0]["routes_in_window"]) if report_route_rows else 0
         )
-        routes = [Route(**r) for r in route_rows] if route_rows else []
-        routes_in_window = len(routes)
-
-        vehicle_routes: Dict[int, List[Route]] = {}
-        if allocated_route_rows:
-            for route in [Route(**r) for r in allocated_route_rows]:
-                vid = route.vehicle_id
-                if vid is not None:
-                    vehicle_routes.setdefault(vid, []).append(route)
-            for vid in vehicle_routes:
-                vehicle_routes[vid].sort(key=lambda r: r.plan_start_date_time)
+        allocated_route_rows = [
+            r for r in report_route_rows if r["route_id"] is not None
+        ]
 
-        routes_allocated = None
-        if routes:
-            route_ids = [r.route_id for r in routes]
-            alloc_rows = db.execute_query(
-                Queries.GET_EXISTING_ALLOCATIONS,
-                (site_id, route_ids),
-                fetch=True,
+        # Rows arrive ordered by (vehicle_id, plan_start_date_time), so one
+        # groupby pass yields each vehicle's routes already in start order.
+        vehicle_routes: Dict[int, List[Route]] = {
+            vid: list(routes)
+            for vid, routes in groupby(
+                map(Route.from_row, allocated_route_rows),
+                key=attrgetter("vehicle_id"),
             )
-            routes_allocated = len(alloc_rows) if alloc_rows else 0
+            if vid is not None
+        }
 
-        fleet_eff = self.fleet_avg_efficiency
-        try:
-            eff_rows = db.execute_query(
-                Queries.GET_FLEET_EFFICIENCY, (site_id,), fetch=True
+        # Per-slot rows are only needed for the route-gap breakdown: fetch the
+        # charging slots of vehicles with routes, up to their last route start.
+        # Cumulative sums over the (vehicle, slot) matrix then answer "energy
+        # charged in [a, b)" per vehicle.
+        routed_vehicle_ids = [vid for vid in report_vehicle_ids if vehicle_routes.get(vid)]
+        vehicle_charge_slots: DefaultDict[int, List[Tuple[datetime, float]]] = defaultdict(list)
+        if routed_vehicle_ids:
+            slots_before = max(
+                vehicle_routes[vid][-1].plan_start_date_time for vid in routed_vehicle_ids
             )
-            if eff_rows and eff_rows[0].get("fleet_avg_efficiency") is not None:
-                fleet_eff = float(eff_rows[0]["fleet_avg_efficiency"])
-        except Exception:
-            pass
+            # Tuple rows, in GET_CHARGE_SCHEDULE_CHARGING_SLOTS column order.
+            for vid, t, power in db.stream_query(
+                Queries.GET_CHARGE_SCHEDULE_CHARGING_SLOTS,
+                (schedule_id, routed_vehicle_ids, slots_before),
+                itersize=CHARGE_SCHEDULE_STREAM_ITERSIZE,
+                dict_cursor=False,
+            ):
+                vehicle_charge_slots[vid].append((t, float(power)))
+
+        slot_grid = sorted({t for vslots in vehicle_charge_slots.values() for t, _ in vslots})
+        slot_pos = {t: i for i, t in enumerate(slot_grid)}
+        vehicle_row = {vid: i for i, vid in enumerate(report_vehicle_ids)}
+        row_idx, col_idx, slot_energy = [], [], []
+        for vid, vslots in vehicle_charge_slots.items():
+            v_row = vehicle_row[vid]
+            for t, p in vslots:
+                row_idx.append(v_row)
+                col_idx.append(slot_pos[t])
+                slot_energy.append(p * slot_duration_hours)
+        charge_energy = np.zeros((len(report_vehicle_ids), len(slot_grid)), dtype=np.float64)
+        np.add.at(charge_energy, (row_idx, col_idx), slot_energy)
+        cum_energy = np.zeros((len(report_vehicle_ids), len(slot_grid) + 1), dtype=np.float64)
+        np.cumsum(charge_energy, axis=1, out=cum_energy[:, 1:])
+
+        charger_power_map: Dict[int, float] = {}
+        for r in charger_rows or []:
+            charger_power_map[r["charger_id"]] = float(r["max_power"] or 50.0)
+
+        routes_allocated = None
+        if routes_in_window:
+            routes_allocated = int(report_route_rows[0]["routes_allocated"])
+
+        fleet_eff = self.fleet_avg_efficiency
+        if site_eff is not None:
+            fleet_eff = site_eff
+
+        vehicle_state: Dict[int, dict] = {}
+        for state_row in state_rows:
+            vehicle_state.setdefault(state_row["vehicle_id"], state_row)
 
         vehicle_reports: List[VehicleScheduleReport] = []
         total_charging_minutes_fleet = 0.0
 
-        for vid in sorted(vehicle_charge_slots.keys()):
-            slots = vehicle_charge_slots[vid]
+        for vid in report_vehicle_ids:
+            vehicle_cum_energy = cum_energy[vehicle_row[vid]]
             total_kwh = vehicle_energy[vid]
-            state_rows = db.execute_query(
-                Queries.GET_VEHICLE_CHARGE_STATE_AS_OF,
-                (timestamp, vid),
-                fetch=True,
-            )
+            s = vehicle_state.get(vid)
             initial_soc_kwh = None
             initial_soc_percent = None
             battery_kwh = None
             charge_rate_kw = 11.0
             efficiency = fleet_eff
-            if state_rows:
-                s = state_rows[0]
+            if s:
                 battery_kwh = float(s["battery_capacity"] or 0)
                 soc_pct = (
                     float(s["estimated_soc"])
@@ -923,10 +1143,8 @@ class UnifiedController:
 
             if vroutes:
                 first_start = vroutes[0].plan_start_date_time
-                energy_before = sum(
-                    p * slot_duration_hours
-                    for t, p in slots
-                    if t < first_start and p > 0
+                energy_before = float(
+                    vehicle_cum_energy[bisect_left(slot_grid, first_start)]
                 )
                 if charge_rate_kw > 0:
                     charging_minutes_before_first_route = (
@@ -935,10 +1153,12 @@ class UnifiedController:
                 for i in range(len(vroutes) - 1):
                     gap_start = vroutes[i].plan_end_date_time
                     gap_end = vroutes[i + 1].plan_start_date_time
-                    energy_between = sum(
-                        p * slot_duration_hours
-                        for t, p in slots
-                        if gap_start <= t < gap_end and p > 0
+                    energy_between = max(
+                        float(
+                            vehicle_cum_energy[bisect_left(slot_grid, gap_end)]
+                            - vehicle_cum_energy[bisect_left(slot_grid, gap_start)]
+                        ),
+                        0.0,
                     )
                     mins = (
                         (energy_between / charge_rate_kw) * 60.0
@@ -1019,4 +1239,5 @@ class UnifiedController:
         )
 
     def close(self):
+        """Close the shared connection pool (for one-shot scripts)."""
         db.close()
@@ -1,67 +1,222 @@
 """Database connection management."""
+import csv
+import io
+import re
+import threading
+import uuid
+import weakref
+from datetime import datetime
+
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 from contextlib import contextmanager
-from src.config import DB_CONFIG
+from src.config import (
+    DB_ANY_ARRAY_MAX_ELEMENTS,
+    DB_BULK_INSERT_PAGE_SIZE,
+    DB_CONFIG,
+    DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+    DB_POOL_MAX_CONNECTIONS,
+    DB_POOL_MIN_CONNECTIONS,
+)
+from src.database.queries import PreparedQueries, Queries
 from src.utils.logging_config import logger
 
+_PLACEHOLDER = re.compile(r"%s")
+
+
+def _prepare_statement_sql(name, query):
+    """Build ``PREPARE name AS ...`` with ``%s`` placeholders renumbered to ``$n``."""
+    counter = iter(range(1, query.count("%s") + 1))
+    return f"PREPARE {name} AS {_PLACEHOLDER.sub(lambda _m: f'${next(counter)}', query)}"
+
+
+def _execute_statement_sql(name, query):
+    """Build ``EXECUTE name (%s, ...)`` with one placeholder per statement parameter."""
+    n_params = query.count("%s")
+    if not n_params:
+        return f"EXECUTE {name}"
+    return f"EXECUTE {name} ({', '.join(['%s'] * n_params)})"
+
+
+# SQL text for the registered statements, built once at import
+_PREPARE_ALL_SQL = ";\n".join(
+    _prepare_statement_sql(name, query)
+    for name, query in PreparedQueries.STATEMENTS.items()
+)
+_EXECUTE_SQL = {
+    name: _execute_statement_sql(name, query)
+    for name, query in PreparedQueries.STATEMENTS.items()
+}
+
 
 class DatabaseConnection:
-    """Manages PostgreSQL database connections."""
+    """Manages a pool of PostgreSQL database connections."""
     
     def __init__(self):
         """Initialize database connection configuration."""
         self.config = DB_CONFIG
-        self._connection = None
+        self._pool = None
+        # Connection pinned by transaction() for the current thread
+        self._local = threading.local()
+        # ThreadedConnectionPool raises instead of blocking when all
+        # connections are out; checkouts wait on this for a free slot.
+        self._slots = threading.BoundedSemaphore(DB_POOL_MAX_CONNECTIONS)
+        # Names of PreparedQueries statements prepared on each pooled
+        # connection (statements live as long as the session)
+        self._prepared = weakref.WeakKeyDictionary()
+        self._prepared_lock = threading.Lock()
+    
+    @property
+    def is_connected(self):
+        """True if the connection pool is open."""
+        return self._pool is not None and not self._pool.closed
     
     def connect(self):
-        """Establish database connection."""
+        """Open the connection pool (no-op if it is already open)."""
+        if self.is_connected:
+            return self._pool
         try:
-            self._connection = psycopg2.connect(
+            self._pool = ThreadedConnectionPool(
+                DB_POOL_MIN_CONNECTIONS,
+                DB_POOL_MAX_CONNECTIONS,
                 user=self.config['user'],
                 password=self.config['password'],
                 database=self.config['database'],
                 host=self.config['host'],
                 port=self.config['port']
             )
-            logger.info("Database connection established successfully")
-            return self._connection
+            logger.info("Database connection pool established successfully")
+            return self._pool
         except psycopg2.Error as e:
             logger.error(f"Database connection failed: {e}")
             raise
     
     def close(self):
-        """Close database connection."""
-        if self._connection:
-            self._connection.close()
-            logger.info("Database connection closed")
+        """Close all pooled database connections."""
+        if self.is_connected:
+            self._pool.closeall()
+            logger.info("Database connection pool closed")
+    
+    def _acquire(self, pool):
+        """Borrow a pooled connection, waiting for one if all are in use."""
+        if not self._slots.acquire(timeout=DB_POOL_CHECKOUT_TIMEOUT_SECONDS):
+            raise PoolError(
+                f"no pooled connection free after {DB_POOL_CHECKOUT_TIMEOUT_SECONDS}s"
+            )
+        try:
+            return pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def _release(self, pool, conn):
+        """Return a connection taken with ``_acquire`` to the pool."""
+        try:
+            pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            self._slots.release()
+    
+    def _checkout(self, pool):
+        """Borrow a pooled connection, preparing the registered statements on first use."""
+        conn = self._acquire(pool)
+        with self._prepared_lock:
+            if conn in self._prepared:
+                return conn
+            self._prepared[conn] = set()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(_PREPARE_ALL_SQL)
+            conn.commit()
+            self._prepared[conn].update(PreparedQueries.STATEMENTS)
+        except psycopg2.Error as e:
+            # Fall back to plain statements on this connection
+            conn.rollback()
+            logger.warning(f"Could not prepare statements: {e}")
+        return conn
+    
+    @contextmanager
+    def _connection_scope(self):
+        """
+        Yield a connection and whether this scope owns its transaction.
+        
+        Inside ``transaction()`` the thread's pinned connection is reused and
+        the caller's transaction is left open; otherwise a connection is
+        borrowed from the pool and returned afterwards.
+        """
+        pinned = getattr(self._local, 'connection', None)
+        if pinned is not None:
+            yield pinned, False
+            return
+        pool = self.connect()
+        conn = self._checkout(pool)
+        try:
+            yield conn, True
+        finally:
+            self._release(pool, conn)
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Run every statement issued by this thread in a single transaction.
+        
+        Commits on success and rolls back on any exception. Nested calls join
+        the outer transaction.
+        
+        Yields:
+            The pinned connection
+        """
+        pinned = getattr(self._local, 'connection', None)
+        if pinned is not None:
+            yield pinned
+            return
+        pool = self.connect()
+        conn = self._checkout(pool)
+        self._local.connection = conn
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._local.connection = None
+            self._release(pool, conn)
     
     @contextmanager
     def get_cursor(self, dict_cursor=True):
         """
         Context manager for database cursor.
         
+        Outside ``transaction()`` each cursor commits on success; inside it,
+        commit/rollback is left to the enclosing transaction.
+        
         Args:
             dict_cursor: If True, return results as dictionaries
         
         Yields:
             Database cursor
         """
-        conn = self._connection or self.connect()
         cursor_factory = RealDictCursor if dict_cursor else None
-        cursor = conn.cursor(cursor_factory=cursor_factory)
-        
-        try:
-            yield cursor
-            conn.commit()
-        except psycopg2.Error as e:
-            conn.rollback()
-            logger.error(f"Database error: {e}")
-            raise
-        finally:
-            cursor.close()
+        with self._connection_scope() as (conn, owns_transaction):
+            cursor = conn.cursor(cursor_factory=cursor_factory)
+            try:
+                yield cursor
+                if owns_transaction:
+                    conn.commit()
+            except psycopg2.Error as e:
+                if owns_transaction:
+                    conn.rollback()
+                logger.error(f"Database error: {e}")
+                raise
+            except Exception:
+                if owns_transaction:
+                    conn.rollback()
+                raise
+            finally:
+                cursor.close()
     
-    def execute_query(self, query, params=None, fetch=True):
+    def execute_query(self, query, params=None, fetch=True, dict_cursor=True):
         """
         Execute a query and return results.
         
@@ -69,16 +224,82 @@ class DatabaseConnection:
             query: SQL query string
             params: Query parameters
             fetch: Whether to fetch results
+            dict_cursor: If True, return dictionaries; otherwise plain tuples
+                in SELECT column order
         
         Returns:
             Query results if fetch=True, otherwise None
         """
-        with self.get_cursor() as cursor:
+        with self.get_cursor(dict_cursor=dict_cursor) as cursor:
             cursor.execute(query, params)
             if fetch:
                 return cursor.fetchall()
             return None
     
+    def execute_prepared(self, name, params=None, fetch=True):
+        """
+        Execute a ``PreparedQueries`` statement with ``EXECUTE``.
+        
+        Repeated calls skip server-side parsing and planning. If the
+        statement could not be prepared on this connection, its SQL is run
+        directly.
+        
+        Args:
+            name: Statement name (a ``PreparedQueries`` attribute)
+            params: Query parameters
+            fetch: Whether to fetch results
+        
+        Returns:
+            Query results if fetch=True, otherwise None
+        """
+        params = tuple(params or ())
+        with self.get_cursor() as cursor:
+            if name in self._prepared.get(cursor.connection, ()):
+                cursor.execute(_EXECUTE_SQL[name], params or None)
+            else:
+                cursor.execute(PreparedQueries.STATEMENTS[name], params or None)
+            if fetch:
+                return cursor.fetchall()
+            return None
+    
+    def stream_query(self, query, params=None, itersize=1000, dict_cursor=True):
+        """
+        Execute a query on a server-side (named) cursor and yield rows lazily.
+        
+        Rows are transferred from the server in batches of ``itersize`` instead
+        of being materialised all at once by ``fetchall``.
+        
+        Args:
+            query: SQL query string
+            params: Query parameters
+            itersize: Number of rows fetched per network round-trip
+            dict_cursor: If True, yield dictionaries; otherwise plain tuples
+                in SELECT column order (cheaper for large result sets)
+        
+        Yields:
+            Result rows
+        """
+        with self._connection_scope() as (conn, owns_transaction):
+            cursor = conn.cursor(
+                name=f"stream_{uuid.uuid4().hex}",
+                cursor_factory=RealDictCursor if dict_cursor else None,
+            )
+            cursor.itersize = itersize
+            
+            try:
+                cursor.execute(query, params)
+                for row in cursor:
+                    yield row
+                if owns_transaction:
+                    conn.commit()
+            except psycopg2.Error as e:
+                if owns_transaction:
+                    conn.rollback()
+                logger.error(f"Database error: {e}")
+                raise
+            finally:
+                cursor.close()
+    
     def execute_many(self, query, params_list):
         """
         Execute a query with multiple parameter sets.
@@ -90,6 +311,51 @@ class DatabaseConnection:
         with self.get_cursor() as cursor:
             cursor.executemany(query, params_list)
     
+    def execute_values_bulk(self, query, rows, page_size=DB_BULK_INSERT_PAGE_SIZE, cursor=None):
+        """
+        Insert many rows with multi-row statements via ``execute_values``.
+        
+        Unlike ``execute_many`` (one statement per row), rows are sent
+        ``page_size`` at a time in a single ``VALUES`` list.
+        
+        Args:
+            query: SQL with a single ``VALUES %s`` placeholder
+            rows: List of parameter tuples
+            page_size: Rows per statement
+            cursor: Optional open cursor, to run inside the caller's transaction
+        """
+        if not rows:
+            return
+        if cursor is not None:
+            execute_values(cursor, query, rows, page_size=page_size)
+            return
+        with self.get_cursor() as cur:
+            execute_values(cur, query, rows, page_size=page_size)
+    
+    def copy_rows_bulk(self, copy_sql, rows, cursor=None):
+        """
+        Load many rows with ``COPY ... FROM STDIN WITH (FORMAT CSV)``.
+        
+        Faster than ``execute_values_bulk`` for very large batches since no
+        INSERT statement is parsed. ``None`` is written as an empty (NULL)
+        field.
+        
+        Args:
+            copy_sql: ``COPY <table> (<columns>) FROM STDIN WITH (FORMAT CSV)``
+            rows: Iterable of tuples in the COPY column order
+            cursor: Optional open cursor, to run inside the caller's transaction
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        if not buffer.tell():
+            return
+        buffer.seek(0)
+        if cursor is not None:
+            cursor.copy_expert(copy_sql, buffer)
+            return
+        with self.get_cursor() as cur:
+            cur.copy_expert(copy_sql, buffer)
+    
     def call_stored_procedure(self, proc_name, params=None):
         """
         Call a stored procedure.
@@ -122,18 +388,31 @@ class DatabaseConnection:
         Returns:
             Dict mapping every vehicle_id -> charger_id or None. Size equals len(vehicle_ids).
         """
-        from src.database.queries import Queries
-        from datetime import datetime
-        
         if not vehicle_ids:
             return {}
         
         # Use reference time or current time
         ref_time = reference_time or datetime.now()
         
-        query = Queries.GET_VEHICLE_CHARGERS_IN_WINDOW
-        # Pass vehicle_ids as a list for ANY() operator, and ref_time twice
-        results = self.execute_query(query, (vehicle_ids, ref_time, ref_time))
+        if len(vehicle_ids) > DB_ANY_ARRAY_MAX_ELEMENTS:
+            # Large id lists: join a temp key table rather than ANY(array)
+            with self.get_cursor() as cursor:
+                cursor.execute(Queries.CREATE_VEHICLE_KEYS_TEMP)
+                self.copy_rows_bulk(
+                    Queries.COPY_VEHICLE_KEYS,
+                    ((vid,) for vid in dict.fromkeys(vehicle_ids)),
+                    cursor=cursor,
+                )
+                cursor.execute(Queries.ANALYZE_VEHICLE_KEYS)
+                cursor.execute(
+                    Queries.GET_VEHICLE_CHARGERS_IN_WINDOW_LARGE, (ref_time, ref_time)
+                )
+                results = cursor.fetchall()
+        else:
+            # Pass vehicle_ids as a list for ANY() operator, and ref_time twice
+            results = self.execute_query(
+                Queries.GET_VEHICLE_CHARGERS_IN_WINDOW, (vehicle_ids, ref_time, ref_time)
+            )
         
         # One entry per vehicle; vehicles with no charge in window or that lost charger get None
         charger_map = {vid: None for vid in vehicle_ids}
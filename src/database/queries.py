@@ -1,5 +1,4 @@
 """SQL queries for database operations."""
-from datetime import datetime, timedelta
 
 
 class Queries:
@@ -22,72 +21,115 @@ class Queries:
     """
     
     # Route Plan Queries
-    GET_ROUTES_IN_WINDOW = """
-        SELECT 
-            route_id, site_id, vehicle_id, route_status, route_alias,
-            plan_start_date_time, actual_start_date_time,
-            plan_end_date_time, actual_end_date_time,
-            plan_mileage, n_orders
-        FROM t_route_plan
-        WHERE site_id = %s
-            AND route_status = 'N'
-            AND plan_start_date_time >= %s
-            AND plan_start_date_time <= %s
-        ORDER BY plan_start_date_time ASC
-    """
-    
-    # Allocated routes in window (for schedule report: use t_route_allocated)
-    GET_ALLOCATED_ROUTES_IN_WINDOW = """
-        SELECT 
-            rp.route_id, rp.site_id, ra.vehicle_id_allocated AS vehicle_id,
-            rp.route_status, rp.route_alias,
-            rp.plan_start_date_time, rp.actual_start_date_time,
-            rp.plan_end_date_time, rp.actual_end_date_time,
-            rp.plan_mileage, rp.n_orders
-        FROM t_route_plan rp
-        INNER JOIN t_route_allocated ra ON rp.route_id = ra.route_id AND rp.site_id = ra.site_id
-        WHERE ra.site_id = %s
-            AND rp.plan_start_date_time >= %s
-            AND rp.plan_start_date_time <= %s
-            AND rp.route_status IN ('N', 'A')
-        ORDER BY ra.vehicle_id_allocated, rp.plan_start_date_time ASC
+    # Open routes in the window plus each route's current allocation in one
+    # round-trip. Route columns come first, in Route field order, followed by
+    # vehicle_id_allocated (NULL if unallocated).
+    GET_ROUTES_AND_ALLOCATIONS_IN_WINDOW = """
+        WITH routes AS MATERIALIZED (
+            SELECT 
+                route_id, site_id, route_alias, route_status,
+                plan_start_date_time, plan_end_date_time,
+                plan_mileage, n_orders,
+                vehicle_id, actual_start_date_time, actual_end_date_time
+            FROM t_route_plan
+            WHERE site_id = %s
+                AND route_status = 'N'
+                AND plan_start_date_time >= %s
+                AND plan_start_date_time <= %s
+        )
+        SELECT r.*, ra.vehicle_id_allocated
+        FROM routes r
+        LEFT JOIN t_route_allocated ra
+            ON ra.route_id = r.route_id AND ra.site_id = r.site_id
+        ORDER BY r.plan_start_date_time ASC
+    """
+    
+    # Schedule report: allocated routes in window plus the in-window route and
+    # allocation counts in one round-trip. The counts repeat on every row; when
+    # nothing is allocated a single row with NULL route columns is returned.
+    GET_SCHEDULE_REPORT_ROUTES = """
+        WITH in_window AS (
+            SELECT route_id
+            FROM t_route_plan
+            WHERE site_id = %s
+                AND route_status = 'N'
+                AND plan_start_date_time >= %s
+                AND plan_start_date_time <= %s
+        ),
+        counts AS (
+            SELECT
+                (SELECT COUNT(*) FROM in_window) AS routes_in_window,
+                (
+                    SELECT COUNT(*)
+                    FROM t_route_allocated ra
+                    WHERE ra.site_id = %s
+                        AND ra.route_id IN (SELECT route_id FROM in_window)
+                ) AS routes_allocated
+        ),
+        allocated AS (
+            SELECT 
+                rp.route_id, rp.site_id, ra.vehicle_id_allocated AS vehicle_id,
+                rp.route_status, rp.route_alias,
+                rp.plan_start_date_time, rp.actual_start_date_time,
+                rp.plan_end_date_time, rp.actual_end_date_time,
+                rp.plan_mileage, rp.n_orders
+            FROM t_route_plan rp
+            INNER JOIN t_route_allocated ra ON rp.route_id = ra.route_id AND rp.site_id = ra.site_id
+            WHERE ra.site_id = %s
+                AND rp.plan_start_date_time >= %s
+                AND rp.plan_start_date_time <= %s
+                AND rp.route_status IN ('N', 'A')
+        )
+        SELECT counts.routes_in_window, counts.routes_allocated, allocated.*
+        FROM counts
+        LEFT JOIN allocated ON TRUE
+        ORDER BY allocated.vehicle_id, allocated.plan_start_date_time ASC
     """
     
     # Vehicle Queries
+    # Telematic labels are not joined here; they are only needed for Microlise
+    # dispatch, which loads them on demand (GET_VEHICLE_TELEMATICS_DICT).
     GET_ACTIVE_VEHICLES = '''
         SELECT 
             v.vehicle_id, v.site_id, v.active, v."VOR",
             v.charge_power_ac, v.charge_power_dc,
-            v.battery_capacity, v.efficiency_kwh_mile,
-            vt.telematic_label
+            v.battery_capacity, v.efficiency_kwh_mile
         FROM t_vehicle v
-        LEFT JOIN t_vehicle_telematics vt 
-            ON v.vehicle_id = vt.vehicle_id AND vt.telematic_id = 2
         WHERE v.site_id = %s
             AND v.active = true
             AND v."VOR" = false
+            AND NOT EXISTS (
+                SELECT 1
+                FROM (
+                    SELECT vsm.estimated_soc
+                    FROM t_vsm vsm
+                    WHERE vsm.vehicle_id = v.vehicle_id
+                        AND (%s::timestamp IS NULL OR vsm.date_time <= %s)
+                    ORDER BY vsm.date_time DESC
+                    LIMIT 1
+                ) latest_vsm
+                WHERE latest_vsm.estimated_soc = -111
+            )
     '''
     
     # Vehicle State Management Queries
-    GET_LATEST_VSM = """
-        SELECT 
+    GET_LATEST_VSM_BULK = """
+        SELECT DISTINCT ON (vehicle_id)
             vehicle_id, date_time, status, route_id,
             estimated_soc, return_eta, return_soc
         FROM t_vsm
-        WHERE vehicle_id = %s
-        ORDER BY date_time DESC
-        LIMIT 1
+        WHERE vehicle_id = ANY(%s)
+        ORDER BY vehicle_id, date_time DESC
     """
     
-    GET_VSM_AS_OF = """
-        SELECT 
+    GET_VSM_AS_OF_BULK = """
+        SELECT DISTINCT ON (vehicle_id)
             vehicle_id, date_time, status, route_id,
             estimated_soc, return_eta, return_soc
         FROM t_vsm
-        WHERE vehicle_id = %s
+        WHERE vehicle_id = ANY(%s)
             AND date_time <= %s
-        ORDER BY date_time DESC
-        LIMIT 1
+        ORDER BY vehicle_id, date_time DESC
     """
     
     GET_ALL_VSM_FOR_SITE = """
@@ -101,14 +143,6 @@ class Queries:
     """
     
     # Vehicle Charge Queries
-    GET_VEHICLE_CHARGER = """
-        SELECT charger_id, start_date_time
-        FROM t_vehicle_charge
-        WHERE vehicle_id = %s
-        ORDER BY start_date_time DESC
-        LIMIT 1
-    """
-    
     GET_VEHICLE_CHARGERS_IN_WINDOW = """
         WITH latest_charges AS (
             SELECT DISTINCT ON (vehicle_id)
@@ -125,6 +159,42 @@ class Queries:
         FROM latest_charges
     """
     
+    # GET_VEHICLE_CHARGERS_IN_WINDOW for large id lists: joins the _vehicle_keys
+    # temp table (CREATE_VEHICLE_KEYS_TEMP + COPY_VEHICLE_KEYS) instead of
+    # ANY(%s), so the planner keeps index scans and sees the row count.
+    # Params: (reference_time, reference_time)
+    GET_VEHICLE_CHARGERS_IN_WINDOW_LARGE = """
+        WITH latest_charges AS (
+            SELECT DISTINCT ON (vc.vehicle_id)
+                vc.vehicle_id,
+                vc.charger_id,
+                vc.start_date_time
+            FROM t_vehicle_charge vc
+            INNER JOIN _vehicle_keys k USING (vehicle_id)
+            WHERE vc.start_date_time < %s
+                AND vc.start_date_time > %s - interval '18 hours'
+            ORDER BY vc.vehicle_id, vc.start_date_time DESC
+        )
+        SELECT vehicle_id, charger_id, start_date_time
+        FROM latest_charges
+    """
+    
+    # Transaction-scoped key table for large id-list lookups
+    CREATE_VEHICLE_KEYS_TEMP = """
+        CREATE TEMP TABLE IF NOT EXISTS _vehicle_keys (
+            vehicle_id INTEGER PRIMARY KEY
+        ) ON COMMIT DROP;
+        TRUNCATE _vehicle_keys
+    """
+    
+    COPY_VEHICLE_KEYS = """
+        COPY _vehicle_keys (vehicle_id) FROM STDIN WITH (FORMAT CSV)
+    """
+    
+    ANALYZE_VEHICLE_KEYS = """
+        ANALYZE _vehicle_keys
+    """
+    
     # Site Queries
     GET_SITE_ASC = """
         SELECT "ASC"
@@ -140,34 +210,36 @@ class Queries:
     """
     
     # Route Allocated Queries
-    GET_EXISTING_ALLOCATIONS = """
-        SELECT 
-            route_id, vehicle_id_allocated, status,
-            estimated_arrival, estimated_arrival_soc
-        FROM t_route_allocated
-        WHERE site_id = %s
-            AND route_id = ANY(%s)
-    """
-    
     DELETE_SITE_ALLOCATIONS = """
         DELETE FROM t_route_allocated
         WHERE site_id = %s
     """
     
-    INSERT_ROUTE_ALLOCATED = """
-        INSERT INTO t_route_allocated (
+    # Multi-row allocation insert for execute_values: rows written to
+    # t_route_allocated are copied to t_route_allocated_history in the same
+    # statement
+    INSERT_ROUTE_ALLOCATED_WITH_HISTORY_VALUES = """
+        WITH ins AS (
+            INSERT INTO t_route_allocated (
+                allocation_id, route_id, site_id, vehicle_id_allocated,
+                status, estimated_arrival, estimated_arrival_soc,
+                http_response, vehicle_id_actual
+            ) VALUES %s
+            RETURNING
+                allocation_id, route_id, site_id, vehicle_id_allocated,
+                status, estimated_arrival, estimated_arrival_soc,
+                http_response, vehicle_id_actual
+        )
+        INSERT INTO t_route_allocated_history (
             allocation_id, route_id, site_id, vehicle_id_allocated,
             status, estimated_arrival, estimated_arrival_soc,
             http_response, vehicle_id_actual
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    
-    INSERT_ROUTE_ALLOCATED_HISTORY = """
-        INSERT INTO t_route_allocated_history (
+        )
+        SELECT
             allocation_id, route_id, site_id, vehicle_id_allocated,
             status, estimated_arrival, estimated_arrival_soc,
             http_response, vehicle_id_actual
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        FROM ins
     """
     
     # MAF Stored Procedure
@@ -175,6 +247,21 @@ class Queries:
         SELECT sp_get_module_params(%s)
     """
     
+    # Module params plus forecast/price horizons in a single round-trip
+    GET_MODULE_PARAMS_WITH_HORIZONS = """
+        SELECT
+            sp_get_module_params(%s) AS sp_get_module_params,
+            (
+                SELECT MAX(forecasted_date_time)
+                FROM t_site_energy_forecast_history
+                WHERE site_id = %s
+            ) AS max_forecast_time,
+            (
+                SELECT MAX(date_time)
+                FROM t_multisite_electricity_price
+            ) AS max_price_time
+    """
+    
     # Alert Queries
     INSERT_ALERT = """
         INSERT INTO t_alert (
@@ -192,11 +279,15 @@ class Queries:
     # ===== SCHEDULER QUERIES =====
     
     # Scheduler Configuration Queries (t_scheduler schema)
+    # CREATE_SCHEDULER and UPDATE_SCHEDULER_STATUS return the same columns as
+    # GET_SCHEDULER_CONFIG, so callers get the current row without re-reading it.
     CREATE_SCHEDULER = """
         INSERT INTO t_scheduler (
             device_id, scheduler_type, status, latest_schedule
         ) VALUES (%s, %s, %s, %s)
-        RETURNING schedule_id
+        RETURNING
+            schedule_id, device_id, scheduler_type, status,
+            profile_end, created_datetime
     """
     
     GET_SCHEDULER_CONFIG = """
@@ -211,6 +302,9 @@ class Queries:
         UPDATE t_scheduler
         SET status = %s, modified_datetime = now()
         WHERE schedule_id = %s
+        RETURNING
+            schedule_id, device_id, scheduler_type, status,
+            profile_end, created_datetime
     """
     
     # Route Plan Queries for Scheduler (multi-route)
@@ -227,41 +321,34 @@ class Queries:
         ORDER BY plan_start_date_time ASC
     """
     
-    GET_ROUTES_FOR_SCHEDULING_ALLOCATED = """
-        SELECT 
-            rp.route_id, rp.site_id, ra.vehicle_id_allocated as vehicle_id,
-            rp.route_status, rp.route_alias,
-            rp.plan_start_date_time, rp.actual_start_date_time,
-            rp.plan_end_date_time, rp.actual_end_date_time,
-            rp.plan_mileage, rp.n_orders
-        FROM t_route_plan rp
-        INNER JOIN t_route_allocated ra ON rp.route_id = ra.route_id
-        WHERE ra.vehicle_id_allocated = %s
-            AND rp.plan_start_date_time BETWEEN %s AND %s
-            AND rp.route_status IN ('N', 'A')
-        ORDER BY rp.plan_start_date_time ASC
-    """
-    
     GET_ALL_VEHICLES_FOR_SCHEDULING = """
         SELECT 
             v.vehicle_id, v.site_id, v.active, v."VOR",
             v.charge_power_ac, v.charge_power_dc,
-            v.battery_capacity, v.efficiency_kwh_mile,
-            vt.telematic_label
+            v.battery_capacity, v.efficiency_kwh_mile
         FROM t_vehicle v
-        LEFT JOIN t_vehicle_telematics vt 
-            ON v.vehicle_id = vt.vehicle_id AND vt.telematic_id = 2
         WHERE v.site_id = %s
     """
     
-    # Fleet Efficiency Calculation
+    # Fleet Efficiency (precomputed per site by mv_fleet_efficiency, migration 005).
+    # Sites the view has no row for yet (not refreshed since their vehicles were
+    # added) fall back to the live t_vehicle aggregate. No row when the site has
+    # no vehicle with an efficiency. Params: (site_id, site_id, site_id)
     GET_FLEET_EFFICIENCY = """
-        SELECT 
+        SELECT vehicle_count, fleet_avg_efficiency
+        FROM mv_fleet_efficiency
+        WHERE site_id = %s
+        UNION ALL
+        SELECT
             COUNT(*) as vehicle_count,
             AVG(efficiency_kwh_mile) as fleet_avg_efficiency
         FROM t_vehicle
         WHERE site_id = %s
             AND efficiency_kwh_mile IS NOT NULL
+            AND NOT EXISTS (
+                SELECT 1 FROM mv_fleet_efficiency WHERE site_id = %s
+            )
+        HAVING COUNT(*) > 0
     """
     
     # Forecast and Price Data Horizon
@@ -279,7 +366,7 @@ class Queries:
     GET_FORECAST_DATA = """
         SELECT 
             forecasted_date_time,
-            forecasted_consumption
+            forecasted_consumption::float8 AS forecasted_consumption
         FROM t_site_energy_forecast_history
         WHERE site_id = %s
             AND forecasted_date_time BETWEEN %s AND %s
@@ -290,7 +377,7 @@ class Queries:
     GET_PRICE_DATA = """
         SELECT 
             date_time,
-            electricty_price_fixed,
+            electricty_price_fixed::float8 AS electricty_price_fixed,
             triad
         FROM t_multisite_electricity_price
         WHERE date_time BETWEEN %s AND %s
@@ -298,12 +385,71 @@ class Queries:
     """
     
     # Charge Schedule Results (t_charge_schedule schema)
-    INSERT_CHARGE_SCHEDULE = """
+    # Multi-row upsert of charge schedule slots: per-row columns are passed as
+    # one array each and expanded server-side with UNNEST. Slots whose values
+    # are unchanged are left untouched (requires migration 003's unique index).
+    # Params: (schedule_id, power_unit_id, charge_profile_flag, created_date_time,
+    #          capacity_line, opt_level, vehicle_ids[], charge_start_date_times[],
+    #          charge_powers[], connector_ids[], assigned_charger_powers_kw[])
+    UPSERT_CHARGE_SCHEDULE_UNNEST = """
         INSERT INTO t_charge_schedule (
             schedule_id, vehicle_id, charge_start_date_time, charge_power,
             power_unit_id, charge_profile_flag, connector_id,
             created_date_time, capacity_line, opt_level, assigned_charger_power_kw
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        )
+        SELECT
+            %s, u.vehicle_id, u.charge_start_date_time, u.charge_power,
+            %s, %s, u.connector_id,
+            %s, %s, %s, u.assigned_charger_power_kw
+        FROM UNNEST(
+            %s::int[], %s::timestamp[], %s::float8[], %s::text[], %s::numeric[]
+        ) AS u(
+            vehicle_id, charge_start_date_time, charge_power,
+            connector_id, assigned_charger_power_kw
+        )
+        ON CONFLICT (schedule_id, vehicle_id, charge_start_date_time) DO UPDATE SET
+            charge_power = EXCLUDED.charge_power,
+            power_unit_id = EXCLUDED.power_unit_id,
+            charge_profile_flag = EXCLUDED.charge_profile_flag,
+            connector_id = EXCLUDED.connector_id,
+            created_date_time = EXCLUDED.created_date_time,
+            capacity_line = EXCLUDED.capacity_line,
+            opt_level = EXCLUDED.opt_level,
+            assigned_charger_power_kw = EXCLUDED.assigned_charger_power_kw
+        WHERE (
+            t_charge_schedule.charge_power, t_charge_schedule.power_unit_id,
+            t_charge_schedule.charge_profile_flag, t_charge_schedule.connector_id,
+            t_charge_schedule.capacity_line, t_charge_schedule.opt_level,
+            t_charge_schedule.assigned_charger_power_kw
+        ) IS DISTINCT FROM (
+            EXCLUDED.charge_power, EXCLUDED.power_unit_id,
+            EXCLUDED.charge_profile_flag, EXCLUDED.connector_id,
+            EXCLUDED.capacity_line, EXCLUDED.opt_level,
+            EXCLUDED.assigned_charger_power_kw
+        )
+    """
+    
+    # Remove a schedule's slots that are not in the new (vehicle, slot) set.
+    # Params: (schedule_id, vehicle_ids[], charge_start_date_times[])
+    DELETE_CHARGE_SCHEDULE_OBSOLETE_SLOTS = """
+        DELETE FROM t_charge_schedule cs
+        WHERE cs.schedule_id = %s
+            AND NOT EXISTS (
+                SELECT 1
+                FROM UNNEST(%s::int[], %s::timestamp[])
+                    AS k(vehicle_id, charge_start_date_time)
+                WHERE k.vehicle_id = cs.vehicle_id
+                    AND k.charge_start_date_time = cs.charge_start_date_time
+            )
+    """
+    
+    # COPY form of UPSERT_CHARGE_SCHEDULE_UNNEST (same column order) for large batches
+    COPY_CHARGE_SCHEDULE = """
+        COPY t_charge_schedule (
+            schedule_id, vehicle_id, charge_start_date_time, charge_power,
+            power_unit_id, charge_profile_flag, connector_id,
+            created_date_time, capacity_line, opt_level, assigned_charger_power_kw
+        ) FROM STDIN WITH (FORMAT CSV)
     """
     
     DELETE_CHARGE_SCHEDULE_BY_SCHEDULE_ID = """
@@ -311,12 +457,34 @@ class Queries:
         WHERE schedule_id = %s
     """
     
-    GET_CHARGE_SCHEDULE_BY_SCHEDULE_ID = """
+    # Per-vehicle totals for the schedule report (one row per vehicle instead of
+    # one per slot). Params: (slot_duration_hours, schedule_id)
+    GET_CHARGE_SCHEDULE_VEHICLE_SUMMARY = """
         SELECT
-            schedule_id, vehicle_id, charge_start_date_time, charge_power,
-            connector_id, assigned_charger_power_kw
+            vehicle_id,
+            SUM(COALESCE(charge_power, 0)) * %s AS energy_kwh,
+            MIN(charge_start_date_time) AS first_slot_start,
+            MAX(charge_start_date_time) AS last_slot_start,
+            (ARRAY_AGG(connector_id ORDER BY charge_start_date_time)
+                FILTER (WHERE connector_id <> ''))[1] AS connector_id,
+            (ARRAY_AGG(assigned_charger_power_kw ORDER BY charge_start_date_time)
+                FILTER (WHERE assigned_charger_power_kw <> 0))[1] AS assigned_charger_power_kw
+        FROM t_charge_schedule
+        WHERE schedule_id = %s
+        GROUP BY vehicle_id
+        ORDER BY vehicle_id
+    """
+    
+    # Charging (> 0 kW) slots of the given vehicles starting before a cutoff,
+    # for the schedule report's per-route-gap breakdown.
+    # Params: (schedule_id, vehicle_ids, before)
+    GET_CHARGE_SCHEDULE_CHARGING_SLOTS = """
+        SELECT vehicle_id, charge_start_date_time, charge_power
         FROM t_charge_schedule
         WHERE schedule_id = %s
+            AND vehicle_id = ANY(%s)
+            AND charge_power > 0
+            AND charge_start_date_time < %s
         ORDER BY vehicle_id, charge_start_date_time
     """
     
@@ -341,6 +509,8 @@ class Queries:
     """
     
     # Vehicle State for Scheduling
+    # Latest t_vsm / t_vehicle_charge rows are picked with LATERAL ... LIMIT 1,
+    # an index scan on (vehicle_id, date_time DESC) per vehicle (migration 002).
     GET_VEHICLE_CHARGE_STATE = """
         SELECT 
             v.vehicle_id,
@@ -356,24 +526,31 @@ class Queries:
             vc.charger_id,
             c.dc_flag as is_dc_charger
         FROM t_vehicle v
-        LEFT JOIN t_vsm vsm ON v.vehicle_id = vsm.vehicle_id
-            AND vsm.date_time = (
-                SELECT MAX(date_time) 
-                FROM t_vsm 
-                WHERE vehicle_id = v.vehicle_id
-            )
-        LEFT JOIN t_vehicle_charge vc ON v.vehicle_id = vc.vehicle_id
-            AND vc.start_date_time = (
-                SELECT MAX(start_date_time)
-                FROM t_vehicle_charge
-                WHERE vehicle_id = v.vehicle_id
-            )
+        LEFT JOIN LATERAL (
+            SELECT estimated_soc, status, route_id, return_eta, return_soc
+            FROM t_vsm
+            WHERE vehicle_id = v.vehicle_id
+            ORDER BY date_time DESC
+            LIMIT 1
+        ) vsm ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT charger_id
+            FROM t_vehicle_charge
+            WHERE vehicle_id = v.vehicle_id
+            ORDER BY start_date_time DESC
+            LIMIT 1
+        ) vc ON TRUE
         LEFT JOIN t_charger c ON vc.charger_id = c.charger_id
         WHERE v.vehicle_id = %s
     """
 
-    # Vehicle state for scheduling with t_vsm AS_OF a given timestamp (e.g. current_time from test)
-    GET_VEHICLE_CHARGE_STATE_AS_OF = """
+    # Vehicle state with t_vsm and the charger assignment AS_OF a given timestamp
+    # (e.g. current_time from test) for every vehicle of a site; the timestamp is
+    # bound once in the as_of CTE and bounds both laterals
+    # (idx_vehicle_charge_vehicle_start).
+    # Params: (as_of, site_id)
+    GET_VEHICLE_CHARGE_STATE_AS_OF_FOR_SITE = """
+        WITH as_of(ts) AS (VALUES (%s::timestamp))
         SELECT 
             v.vehicle_id,
             v.battery_capacity,
@@ -388,32 +565,27 @@ class Queries:
             vc.charger_id,
             c.dc_flag as is_dc_charger
         FROM t_vehicle v
-        LEFT JOIN t_vsm vsm ON v.vehicle_id = vsm.vehicle_id
-            AND vsm.date_time = (
-                SELECT MAX(date_time)
-                FROM t_vsm
-                WHERE vehicle_id = v.vehicle_id
-                  AND date_time <= %s
-            )
-        LEFT JOIN t_vehicle_charge vc ON v.vehicle_id = vc.vehicle_id
-            AND vc.start_date_time = (
-                SELECT MAX(start_date_time)
-                FROM t_vehicle_charge
-                WHERE vehicle_id = v.vehicle_id
-            )
+        CROSS JOIN as_of
+        LEFT JOIN LATERAL (
+            SELECT estimated_soc, status, route_id, return_eta, return_soc
+            FROM t_vsm
+            WHERE vehicle_id = v.vehicle_id
+              AND date_time <= as_of.ts
+            ORDER BY date_time DESC
+            LIMIT 1
+        ) vsm ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT charger_id
+            FROM t_vehicle_charge
+            WHERE vehicle_id = v.vehicle_id
+              AND start_date_time <= as_of.ts
+            ORDER BY start_date_time DESC
+            LIMIT 1
+        ) vc ON TRUE
         LEFT JOIN t_charger c ON vc.charger_id = c.charger_id
-        WHERE v.vehicle_id = %s
+        WHERE v.site_id = %s
     """
     
-    # Stale Schedule Detection
-    GET_STALE_SCHEDULES = """
-        SELECT schedule_id, device_id, created_datetime
-        FROM t_scheduler
-        WHERE status = 'completed'
-            AND created_datetime < NOW() - INTERVAL '2 hours'
-        ORDER BY created_datetime DESC
-    """
-
     # ===== MICROLISE INTEGRATION QUERIES =====
 
     # Vehicle telematics lookup: FPS vehicle_id <-> Microlise telematic_label
@@ -485,3 +657,25 @@ class Queries:
         WHERE error_datetime >= %s
           AND error_datetime < %s
     """
+
+
+class PreparedQueries:
+    """
+    Statements prepared server-side on every pooled connection.
+    
+    Attributes are statement names for ``db.execute_prepared``; ``STATEMENTS``
+    maps each name to its SQL. Only small statements issued repeatedly (per
+    route or per request) belong here.
+    """
+    
+    INSERT_ALERT = "insert_alert"
+    UPDATE_ROUTE_ALLOCATED_HTTP_RESPONSE = "update_route_allocated_http_response"
+    GET_SCHEDULER_CONFIG = "get_scheduler_config"
+    UPDATE_SCHEDULER_STATUS = "update_scheduler_status"
+    
+    STATEMENTS = {
+        INSERT_ALERT: Queries.INSERT_ALERT,
+        UPDATE_ROUTE_ALLOCATED_HTTP_RESPONSE: Queries.UPDATE_ROUTE_ALLOCATED_HTTP_RESPONSE,
+        GET_SCHEDULER_CONFIG: Queries.GET_SCHEDULER_CONFIG,
+        UPDATE_SCHEDULER_STATUS: Queries.UPDATE_SCHEDULER_STATUS,
+    }
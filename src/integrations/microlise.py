@@ -33,7 +33,7 @@ from requests.exceptions import (
 )
 
 from src.database.connection import db
-from src.database.queries import Queries
+from src.database.queries import PreparedQueries, Queries
 from src.utils.logging_config import logger
 
 # Alert message ID used for all Microlise API failures (matches t_alert.alert_message_id = 9)
@@ -137,7 +137,7 @@ class MicroLiseClient:
             logger.info("Successfully retrieved Microlise OAuth2 token")
             return token
         except (HTTPError, ConnectionError, Timeout, TooManyRedirects, RequestException) as exc:
-            logger.error(f"Failed to retrieve Microlise OAuth2 token: {exc}")
+            logger.error("Failed to retrieve Microlise OAuth2 token: %s", exc)
             raise
 
     # ----------------------------------------------------------------------- #
@@ -153,7 +153,7 @@ class MicroLiseClient:
             fps_to_microlise: ``{fps_vehicle_id -> microlise_label}``
             microlise_to_fps: ``{microlise_label -> fps_vehicle_id}``
         """
-        if not db._connection or db._connection.closed:
+        if not db.is_connected:
             db.connect()
         
         rows = db.execute_query(Queries.GET_VEHICLE_TELEMATICS_DICT) or []
@@ -164,7 +164,7 @@ class MicroLiseClient:
             label = row["telematic_label"]
             fps_to_microlise[vid] = label
             microlise_to_fps[label] = vid
-        logger.debug(f"Loaded {len(fps_to_microlise) - 2} vehicle telematics mappings")
+        logger.debug("Loaded %s vehicle telematics mappings", len(fps_to_microlise) - 2)
         return fps_to_microlise, microlise_to_fps
 
     # ----------------------------------------------------------------------- #
@@ -209,7 +209,7 @@ class MicroLiseClient:
         """
         code = response.status_code
         if code in (200, 201):
-            logger.info(f"Microlise allocation success for route {route_id}: HTTP {code}")
+            logger.info("Microlise allocation success for route %s: HTTP %s", route_id, code)
             return True
 
         test_suffix = ": TEST" if self.connection_type == "test" else ""
@@ -217,16 +217,16 @@ class MicroLiseClient:
             f"Vehicle allocation: Microlise server response - "
             f"{code} {response.text}{test_suffix}"
         )
-        logger.warning(f"Microlise allocation failed for route {route_id}: {dev_app_id}")
+        logger.warning("Microlise allocation failed for route %s: %s", route_id, dev_app_id)
 
         try:
-            db.execute_query(
-                Queries.INSERT_ALERT,
+            db.execute_prepared(
+                PreparedQueries.INSERT_ALERT,
                 (site_id, _MICROLISE_ALERT_ID, dev_app_id, datetime.now()),
                 fetch=False,
             )
         except Exception as exc:
-            logger.error(f"Failed to insert Microlise alert for route {route_id}: {exc}")
+            logger.error("Failed to insert Microlise alert for route %s: %s", route_id, exc)
 
         return False
 
@@ -260,7 +260,7 @@ class MicroLiseClient:
             dispatch statistics and *route_aliases* is the list of route aliases
             present in the current allocation (used for the unallocated report).
         """
-        if not db._connection or db._connection.closed:
+        if not db.is_connected:
             db.connect()
         
         token: Optional[str] = None
@@ -271,7 +271,7 @@ class MicroLiseClient:
         fps_to_microlise, _ = self.get_vehicle_telematics_dict()
 
         rows = db.execute_query(Queries.GET_ROUTES_FOR_DISPATCH) or []
-        logger.info(f"Loaded {len(rows)} routes for dispatch")
+        logger.info("Loaded %s routes for dispatch", len(rows))
 
         # print(f"Rows: {rows}")
         print(f"Site ID: {site_id}")
@@ -292,8 +292,10 @@ class MicroLiseClient:
         print(f"Route aliases: {route_aliases}")
 
         logger.info(
-            f"Dispatching {len(pending)} route(s) to Microlise "
-            f"(allocation_id={allocation_id}, simulate={params.simulate_response})"
+            "Dispatching %d route(s) to Microlise (allocation_id=%s, simulate=%s)",
+            len(pending),
+            allocation_id,
+            params.simulate_response,
         )
 
         success_count = 0
@@ -310,13 +312,13 @@ class MicroLiseClient:
                 response = self._post_vehicle_allocation(route_id, microlise_label, token)
 
             try:
-                db.execute_query(
-                    Queries.UPDATE_ROUTE_ALLOCATED_HTTP_RESPONSE,
+                db.execute_prepared(
+                    PreparedQueries.UPDATE_ROUTE_ALLOCATED_HTTP_RESPONSE,
                     (response.status_code, route_id),
                     fetch=False,
                 )
             except Exception as exc:
-                logger.error(f"Failed to persist http_response for route {route_id}: {exc}")
+                logger.error("Failed to persist http_response for route %s: %s", route_id, exc)
 
             if self.http_response_handler(response, route_id, site_id):
                 success_count += 1
@@ -331,11 +333,13 @@ class MicroLiseClient:
                 fetch=False,
             )
         except Exception as exc:
-            logger.error(f"Failed to update allocation monitor status: {exc}")
+            logger.error("Failed to update allocation monitor status: %s", exc)
 
         logger.info(
-            f"Microlise dispatch complete: {success_count} succeeded, "
-            f"{fail_count} failed, monitor status={final_status}"
+            "Microlise dispatch complete: %d succeeded, %d failed, monitor status=%s",
+            success_count,
+            fail_count,
+            final_status,
         )
 
         result: Dict[str, Any] = {
@@ -362,7 +366,7 @@ class MicroLiseClient:
         then returns those route numbers not already present in
         *allocation_route_aliases*.
         """
-        if not db._connection or db._connection.closed:
+        if not db.is_connected:
             db.connect()
         
         today_local = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -411,7 +415,7 @@ class MicroLiseClient:
             logger.error("pandas not installed; cannot generate compliance report")
             return None
 
-        if not db._connection or db._connection.closed:
+        if not db.is_connected:
             db.connect()
 
         report_date = (datetime.now() - timedelta(days=1)).date()
@@ -429,8 +433,10 @@ class MicroLiseClient:
         ]
         if len(qualifying) != 1:
             logger.info(
-                f"Compliance report: expected 1 qualifying allocation for {report_date}, "
-                f"found {len(qualifying)} – skipping"
+                "Compliance report: expected 1 qualifying allocation for %s, "
+                "found %d – skipping",
+                report_date,
+                len(qualifying),
             )
             return None
 
@@ -512,7 +518,7 @@ class MicroLiseClient:
             logger.error("openpyxl not installed; cannot generate allocation report")
             return
 
-        if not db._connection or db._connection.closed:
+        if not db.is_connected:
             db.connect()
 
         today_str = datetime.now().strftime("%Y_%m_%d")
@@ -586,9 +592,9 @@ class MicroLiseClient:
                 overwrite=True,
                 content_settings=ContentSettings(content_type="file/xlsx"),
             )
-            logger.info(f"Allocation report uploaded to Azure Blob: {blob_name}")
+            logger.info("Allocation report uploaded to Azure Blob: %s", blob_name)
         except Exception as exc:
-            logger.error(f"Failed to upload report to Azure Blob Storage: {exc}")
+            logger.error("Failed to upload report to Azure Blob Storage: %s", exc)
 
     # ----------------------------------------------------------------------- #
     # Main entry point                                                         #
@@ -619,9 +625,12 @@ class MicroLiseClient:
             Dict suitable for inclusion in the API response.
         """
         logger.info(
-            f"Starting Microlise integration run: allocation_id={allocation_id}, "
-            f"site_id={site_id}, simulate={params.simulate_response}, "
-            f"trigger_type={params.trigger_type}"
+            "Starting Microlise integration run: allocation_id=%s, site_id=%s, "
+            "simulate=%s, trigger_type=%s",
+            allocation_id,
+            site_id,
+            params.simulate_response,
+            params.trigger_type,
         )
 
         dispatch_result, route_aliases = self.dispatch_allocations(
@@ -1,18 +1,97 @@
 """MAF parameter parsing module."""
 import json
+import sys
 import traceback
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, Optional
 from src.utils.logging_config import logger
 from src.config import DEFAULT_PENALTIES, DEFAULT_CONSTRAINT_ENABLED
 
+try:
+    import orjson  # optional: faster parsing of JSON-valued parameters
+except ImportError:
+    orjson = None
+
+# Values that mean "no value", and the string literals recognised as booleans
+_NONE_VALUES = frozenset({'NONE', 'None', 'none', 'NO_VALUE', ''})
+_BOOL_VALUES = frozenset({'true', 'false', 'yes', 'no'})
+_TRUE_VALUES = frozenset({'true', 'yes', '1'})
+_BOOL_SUFFIXES = frozenset({'enabled', 'flag'})
+# Distinct (suffix, value) pairs kept by the scalar parse cache
+_PARSE_CACHE_SIZE = 4096
+
+# Constraints configurable through constraint_<name>_<param> MAF parameters
+_CONSTRAINT_PREFIX = 'constraint_'
+_CONSTRAINT_NAMES = (
+    'energy_feasibility',
+    'turnaround_time_strict',
+    'turnaround_time_preferred',
+    'shift_hours_strict',
+    'minimum_soonness',
+    'swap_minimization',
+    'energy_optimization',
+)
+
+
+def _parse_numeric(param_value: str) -> Any:
+    if '.' not in param_value:
+        return int(param_value)
+    return float(param_value)
+
+
+def _parse_time(param_value: str) -> Any:
+    if ':' not in param_value:
+        return param_value
+    return datetime.strptime(param_value, '%H:%M:%S').time()
+
+
+# Last "_"-separated word of a parameter name -> value parser (raises ValueError)
+_SUFFIX_HANDLERS = {
+    **dict.fromkeys(
+        ('minutes', 'hours', 'seconds', 'kwh', 'penalty',
+         'weight', 'bonus', 'threshold', 'count', 'margin'),
+        _parse_numeric,
+    ),
+    'period': _parse_time,
+}
+
+
+def _intern_name(name: Any) -> Any:
+    # Names repeat across sites and runs; interned keys compare by identity
+    # against the literal keys used by get_site_parameter and the constraints.
+    return sys.intern(name) if isinstance(name, str) else name
+
+
+def _loads_json(param_value: str) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(param_value)
+        except orjson.JSONDecodeError:
+            pass  # stdlib also accepts NaN/Infinity; let it decide
+    return json.loads(param_value)
+
+
+@lru_cache(maxsize=_PARSE_CACHE_SIZE)
+def _parse_scalar(suffix: str, param_value: str) -> Any:
+    """Parse a non-JSON value; results are immutable, so they are shared."""
+    lowered = param_value.lower()
+    if suffix in _BOOL_SUFFIXES or lowered in _BOOL_VALUES:
+        return lowered in _TRUE_VALUES
+    handler = _SUFFIX_HANDLERS.get(suffix)
+    if handler is not None:
+        return handler(param_value)
+    return param_value
+
+
 def parse_maf_parameter(param_key: str, param_value: str) -> Any:
     """
     Parse MAF string parameter to appropriate type.
     
     All MAF parameters are stored as {String: String}. This function
     infers the correct type based on parameter naming conventions and
-    value patterns.
+    value patterns. Booleans, numbers, times and strings are memoized on
+    (suffix, value); JSON arrays/objects are parsed fresh on every call.
     
     Args:
         param_key: Parameter name (e.g., "constraint_turnaround_time_strict_enabled")
@@ -22,53 +101,31 @@ def parse_maf_parameter(param_key: str, param_value: str) -> Any:
         Parsed value in appropriate type
     """
     # Handle None/empty
-    if param_value in ['NONE', 'None', 'none', 'NO_VALUE', '', None]:
+    if param_value is None or param_value in _NONE_VALUES:
         return None
     
-    # Boolean detection
-    if param_key.endswith('_enabled') or param_key.endswith('_flag') or \
-       param_value.lower() in ['true', 'false', 'yes', 'no']:
-        return param_value.lower() in ['true', 'yes', '1']
+    # Suffix is the last "_"-separated word; a key without "_" has none
+    _, sep, suffix = param_key.rpartition('_')
+    if not sep:
+        suffix = ''
     
-    # JSON array
-    if param_value.strip().startswith('['):
+    # JSON array / object (boolean-suffixed keys are always booleans)
+    first = param_value.strip()[:1]
+    if (first == '[' or first == '{') and suffix not in _BOOL_SUFFIXES:
         try:
-            return json.loads(param_value)
+            return _loads_json(param_value)
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON array for {param_key}: {param_value} - {e}")
+            kind = 'array' if first == '[' else 'object'
+            logger.error("Failed to parse JSON %s for %s: %s - %s", kind, param_key, param_value, e)
             return param_value
     
-    # JSON object
-    if param_value.strip().startswith('{'):
-        try:
-            return json.loads(param_value)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON object for {param_key}: {param_value} - {e}")
-            return param_value
-    
-    # Numeric detection
-    numeric_suffixes = ['_minutes', '_hours', '_seconds', '_kwh', '_penalty', 
-                        '_weight', '_bonus', '_threshold', '_count', '_margin']
-    if any(param_key.endswith(suffix) for suffix in numeric_suffixes):
-        try:
-            if '.' not in param_value:
-                return int(param_value)
-            else:
-                return float(param_value)
-        except ValueError as e:
-            logger.error(f"Failed to parse numeric for {param_key}: {param_value} - {e}")
-            return None
-    
-    # Time format detection
-    if ':' in param_value and param_key.endswith('_period'):
-        try:
-            return datetime.strptime(param_value, '%H:%M:%S').time()
-        except ValueError as e:
-            logger.error(f"Failed to parse time for {param_key}: {param_value} - {e}")
-            return None
-    
-    # Default: string
-    return param_value
+    # Boolean / numeric / time / string (failures are not cached)
+    try:
+        return _parse_scalar(suffix, param_value)
+    except ValueError as e:
+        kind = 'time' if suffix == 'period' else 'numeric'
+        logger.error("Failed to parse %s for %s: %s - %s", kind, param_key, param_value, e)
+        return None
 
 
 def get_constraint_config(site_id: int, constraint_name: str, maf_params: Dict[str, str]) -> Dict[str, Any]:
@@ -88,7 +145,7 @@ def get_constraint_config(site_id: int, constraint_name: str, maf_params: Dict[s
     enabled = parse_maf_parameter(enabled_key, enabled_value)
     
     if not enabled:
-        logger.info(f"Constraint '{constraint_name}' disabled for site {site_id}")
+        logger.info("Constraint '%s' disabled for site %s", constraint_name, site_id)
         return {'enabled': False, 'params': {}, 'penalty': 0}
     
     # Extract all parameters for this constraint
@@ -103,7 +160,10 @@ def get_constraint_config(site_id: int, constraint_name: str, maf_params: Dict[s
     
     penalty = constraint_params.get('penalty', DEFAULT_PENALTIES.get(constraint_name, -20))
     
-    logger.info(f"Constraint '{constraint_name}' enabled for site {site_id} with {len(constraint_params)} parameters")
+    logger.info(
+        "Constraint '%s' enabled for site %s with %s parameters",
+        constraint_name, site_id, len(constraint_params),
+    )
     
     return {
         'enabled': True,
@@ -123,63 +183,55 @@ def parse_maf_response(maf_json: Dict) -> Dict[int, Dict[str, Any]]:
         Dictionary mapping site_id to configuration parameters
     """
     site_configs = {}
+    parse = parse_maf_parameter
     
     try:
         clients = maf_json.get('clients', [])
-        logger.info(f"Clients: {clients}")
+        logger.debug("Clients: %s", clients)
         for client in clients:
             try:
-                sites = client.get('sites', [])
-                
-                for site in sites:
+                for site in client.get('sites', []):
+                    site_id = None
                     try:
                         site_id = site.get('site_id')
                         if not site_id:
                             continue
 
-                        # Parse site-level parameters
-                        site_params = {}
+                        # Site-level parameters
                         parameters = site.get('parameters', {})
+                        logger.debug("Site parameters: %s", parameters)
+                        site_params = {
+                            name: parse(name, param.get('parameter_value'))
+                            for param in parameters
+                            for name in (_intern_name(param.get('parameter_name')),)
+                        }
 
-                        logger.info(f"Site parameters: {parameters}")
-                        for param in parameters:
-                            # logger.info(f"Parsing MAF parameter: {param.get('parameter_name')} = {param.get('parameter_value')}")
-                            site_params[param.get('parameter_name')] = parse_maf_parameter(param.get('parameter_name'), param.get('parameter_value'))
-                        
-                        # Parse vehicle-specific parameters
-                        vehicles = site.get('vehicles', [])
-                        enabled_vehicles = []
-                        
-                        for vehicle in vehicles:
-                            vehicle_id = vehicle.get('vehicle_id')
-                            enabled = parse_maf_parameter('enabled', vehicle.get('enabled', 'true'))
-                            
-                            if enabled and vehicle_id:
-                                enabled_vehicles.append(vehicle_id)
-
-                        logger.info(f"Enabled vehicles: {enabled_vehicles}")
-                        # logger.info(f"Site parameters: {site_params}")
+                        # Vehicle-specific enable flags
+                        enabled_vehicles = [
+                            vehicle_id
+                            for vehicle in site.get('vehicles', [])
+                            for vehicle_id in (vehicle.get('vehicle_id'),)
+                            if parse('enabled', vehicle.get('enabled', 'true')) and vehicle_id
+                        ]
+                        logger.info("Site %s: %s enabled vehicles", site_id, len(enabled_vehicles))
+                        logger.debug("Enabled vehicles: %s", enabled_vehicles)
                         
                         site_configs[site_id] = {
                             'parameters': site_params,
                             'enabled_vehicles': enabled_vehicles
                         }
-
-                        # logger.info(f"Loaded MAF config for site {site_id}: {site_configs[site_id]}")
-                        
-                        # logger.info(f"Loaded MAF config for site {site_id}: {len(site_params)} parameters, {len(enabled_vehicles)} enabled vehicles")
                     except Exception as e:
-                        logger.error(f"Failed to parse MAF config for site {site_id}: {e}")
+                        logger.error("Failed to parse MAF config for site %s: %s", site_id, e)
                         logger.error(traceback.format_exc())
                         continue
             except Exception as e:
-                logger.error(f"Failed to parse MAF config for client {client.get('client_id')}: {e}")
+                logger.error("Failed to parse MAF config for client %s: %s", client.get('client_id'), e)
                 logger.error(traceback.format_exc())
                 continue
         return site_configs
         
     except Exception as e:
-        logger.error(f"Failed to parse MAF response: {e}")
+        logger.error("Failed to parse MAF response: %s", e)
         logger.error(traceback.format_exc())
         return {}
 
@@ -200,6 +252,34 @@ def get_site_parameter(site_config: Dict, param_key: str, default: Any = None) -
     return params.get(param_key, default)
 
 
+def _group_constraint_params(maf_params: Dict[str, Any], constraint_names) -> Dict[str, Dict[str, Any]]:
+    """
+    Split MAF parameters by constraint in one pass.
+    
+    A key belongs to every constraint whose ``constraint_<name>_`` prefix it
+    starts with; candidate names are the key's "_"-separated leading segments.
+    
+    Args:
+        maf_params: Dictionary of MAF parameters
+        constraint_names: Constraint names to group by
+    
+    Returns:
+        Dictionary mapping each constraint name to its subset of maf_params
+    """
+    grouped = {name: {} for name in constraint_names}
+    prefix_len = len(_CONSTRAINT_PREFIX)
+    for key, value in maf_params.items():
+        if not key.startswith(_CONSTRAINT_PREFIX):
+            continue
+        end = key.find('_', prefix_len)
+        while end != -1:
+            params = grouped.get(key[prefix_len:end])
+            if params is not None:
+                params[key] = value
+            end = key.find('_', end + 1)
+    return grouped
+
+
 def get_all_constraint_configs(site_id: int, site_config: Dict) -> Dict[str, Dict]:
     """
     Get all constraint configurations for a site.
@@ -211,22 +291,12 @@ def get_all_constraint_configs(site_id: int, site_config: Dict) -> Dict[str, Dic
     Returns:
         Dictionary mapping constraint names to their configurations
     """
-    constraint_names = [
-        'energy_feasibility',
-        'turnaround_time_strict',
-        'turnaround_time_preferred',
-        'shift_hours_strict',
-        'minimum_soonness',
-        'swap_minimization',
-        'energy_optimization',
-    ]
-    
-    constraints = {}
     maf_params = site_config.get('parameters', {})
 
-    logger.info(f"MAF params: {maf_params}")
-    
-    for constraint_name in constraint_names:
-        constraints[constraint_name] = get_constraint_config(site_id, constraint_name, maf_params)
+    logger.debug("MAF params: %s", maf_params)
     
-    return constraints
+    grouped = _group_constraint_params(maf_params, _CONSTRAINT_NAMES)
+    return {
+        constraint_name: get_constraint_config(site_id, constraint_name, grouped[constraint_name])
+        for constraint_name in _CONSTRAINT_NAMES
+    }
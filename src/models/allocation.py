@@ -1,10 +1,11 @@
 """Allocation data model."""
+from collections import defaultdict
 from dataclasses import dataclass, field
 from typing import List, Optional
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class RouteAllocation:
     """Represents a single route-to-vehicle allocation."""
     
@@ -83,12 +84,10 @@ class AllocationResult:
         Returns:
             Dictionary mapping vehicle_id to list of route_ids
         """
-        sequences = {}
+        sequences = defaultdict(list)
         for alloc in self.allocations:
-            if alloc.vehicle_id not in sequences:
-                sequences[alloc.vehicle_id] = []
             sequences[alloc.vehicle_id].append(alloc.route_id)
-        return sequences
+        return dict(sequences)
     
     def __repr__(self):
         return f"AllocationResult(id={self.allocation_id}, allocated={self.routes_allocated}/{self.routes_in_window}, score={self.total_score:.2f})"
@@ -1,12 +1,31 @@
 """Route data model."""
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional
 from datetime import datetime, timedelta
 
 
-@dataclass
+# One shared timedelta per turnaround value used by the pairwise route checks
+_TURNAROUND_DELTAS: Dict[float, timedelta] = {}
+
+
+def _turnaround_delta(turnaround_minutes: float) -> timedelta:
+    delta = _TURNAROUND_DELTAS.get(turnaround_minutes)
+    if delta is None:
+        delta = _TURNAROUND_DELTAS.setdefault(
+            turnaround_minutes, timedelta(minutes=turnaround_minutes)
+        )
+    return delta
+
+
+@dataclass(slots=True, frozen=True)
 class Route:
-    """Represents a delivery route."""
+    """
+    Represents a delivery route.
+    
+    Field order matches the column order of the routes CTE in
+    ``GET_ROUTES_AND_ALLOCATIONS_IN_WINDOW`` so that tuple rows can be passed
+    positionally (``Route(*row)``).
+    """
     
     route_id: str
     site_id: int
@@ -20,18 +39,84 @@ class Route:
     actual_start_date_time: Optional[datetime] = None
     actual_end_date_time: Optional[datetime] = None
     energy_kwh: Optional[float] = None  # From scheduling/allocated route data when available
+    _duration_seconds: float = field(init=False, repr=False, compare=False)
+    _start_ts: float = field(init=False, repr=False, compare=False)
+    _end_ts: float = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Planned times never change (frozen), so the duration and epoch
+        # timestamps are computed once.
+        object.__setattr__(
+            self,
+            '_duration_seconds',
+            (self.plan_end_date_time - self.plan_start_date_time).total_seconds(),
+        )
+        object.__setattr__(self, '_start_ts', self.plan_start_date_time.timestamp())
+        object.__setattr__(self, '_end_ts', self.plan_end_date_time.timestamp())
+    
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> 'Route':
+        """
+        Build a Route from a route query row without ``**row`` unpacking.
+        
+        Args:
+            row: Mapping with the t_route_plan columns selected by the route queries
+        
+        Returns:
+            Route instance
+        """
+        return cls(
+            row['route_id'],
+            row['site_id'],
+            row['route_alias'],
+            row['route_status'],
+            row['plan_start_date_time'],
+            row['plan_end_date_time'],
+            row['plan_mileage'],
+            row['n_orders'],
+            row.get('vehicle_id'),
+            row.get('actual_start_date_time'),
+            row.get('actual_end_date_time'),
+            row.get('energy_kwh'),
+        )
     
     @property
     def duration_hours(self) -> float:
         """Get planned route duration in hours."""
-        delta = self.plan_end_date_time - self.plan_start_date_time
-        return delta.total_seconds() / 3600.0
+        return self._duration_seconds / 3600.0
     
     @property
     def duration_minutes(self) -> float:
         """Get planned route duration in minutes."""
-        delta = self.plan_end_date_time - self.plan_start_date_time
-        return delta.total_seconds() / 60.0
+        return self._duration_seconds / 60.0
+    
+    @property
+    def plan_start_ts(self) -> float:
+        """Planned start as epoch seconds (``datetime.timestamp()``)."""
+        return self._start_ts
+    
+    @property
+    def plan_end_ts(self) -> float:
+        """Planned end as epoch seconds (``datetime.timestamp()``)."""
+        return self._end_ts
+    
+    def overlaps_with_ts(self, other_start_ts: float, other_end_ts: float, turnaround_seconds: float = 0.0) -> bool:
+        """
+        Float fast path of ``overlaps_with`` for pairwise checks.
+        
+        Args:
+            other_start_ts: Other route's planned start in epoch seconds
+            other_end_ts: Other route's planned end in epoch seconds
+            turnaround_seconds: Minimum turnaround time between routes
+        
+        Returns:
+            True if routes overlap, False otherwise
+        """
+        if self._end_ts + turnaround_seconds <= other_start_ts:
+            return False
+        if other_end_ts + turnaround_seconds <= self._start_ts:
+            return False
+        return True
     
     def overlaps_with(self, other_route: 'Route', turnaround_minutes: int = 0) -> bool:
         """
@@ -44,7 +129,7 @@ class Route:
         Returns:
             True if routes overlap, False otherwise
         """
-        turnaround_delta = timedelta(minutes=turnaround_minutes)
+        turnaround_delta = _turnaround_delta(turnaround_minutes)
         
         # Check if this route ends before other starts (with turnaround)
         if self.plan_end_date_time + turnaround_delta <= other_route.plan_start_date_time:
@@ -68,7 +153,7 @@ class Route:
         Returns:
             True if routes can be sequenced, False otherwise
         """
-        turnaround_delta = timedelta(minutes=turnaround_minutes)
+        turnaround_delta = _turnaround_delta(turnaround_minutes)
         return self.plan_end_date_time + turnaround_delta <= next_route.plan_start_date_time
     
     def is_energy_feasible(self, vehicle, safety_margin_kwh: float = 5.0) -> bool:
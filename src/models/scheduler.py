@@ -47,7 +47,7 @@ class VehicleScheduleReport:
         }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ChargeSlot:
     """Single 30-minute charge slot assignment."""
 
@@ -55,7 +55,7 @@ class ChargeSlot:
     charge_power_kw: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class VehicleChargeSchedule:
     """Per-vehicle charge schedule from optimization."""
 
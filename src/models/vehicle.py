@@ -1,10 +1,10 @@
 """Vehicle data model."""
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Mapping, Optional
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class Vehicle:
     """Represents a delivery vehicle."""
     
@@ -32,6 +32,29 @@ class Vehicle:
     # Current charger
     current_charger_id: Optional[int] = None
     
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> 'Vehicle':
+        """
+        Build a Vehicle from a GET_ACTIVE_VEHICLES row without ``**row`` unpacking.
+        
+        Args:
+            row: Mapping with the t_vehicle columns selected by GET_ACTIVE_VEHICLES
+        
+        Returns:
+            Vehicle instance
+        """
+        return cls(
+            row['vehicle_id'],
+            row['site_id'],
+            row['active'],
+            row['VOR'],
+            row['charge_power_ac'],
+            row['charge_power_dc'],
+            row['battery_capacity'],
+            row['efficiency_kwh_mile'],
+            row.get('telematic_label'),
+        )
+    
     def is_available_for_allocation(self) -> bool:
         """Check if vehicle can be allocated."""
         return self.active and not self.VOR
@@ -24,6 +24,7 @@ from src.optimizer.cost_matrix import (
     BIG_VALUE,
     AllocationModelData,
     apply_incompatible_route_pair_constraints,
+    first_allowed_vehicle,
 )
 from src.optimizer.optimizer_debug import (
     allocation_model_to_optimization_data,
@@ -329,7 +330,6 @@ class RouteAllocationOptimizer:
         start_time = time.time()
         n_vehicles = len(model_data.vehicles)
         n_routes = len(model_data.routes)
-        assigned_routes: Set[int] = set()
         vehicle_sequences: Dict[int, List[int]] = {}
 
         route_order = sorted(
@@ -337,23 +337,16 @@ class RouteAllocationOptimizer:
             key=lambda r: model_data.routes[r].plan_start_date_time,
         )
 
+        # A route scores the same on every vehicle, so the greedy pick is the
+        # first vehicle it is not forbidden on.
+        best_vehicle = first_allowed_vehicle(model_data.forbidden_nodes, n_vehicles, n_routes)
+        scores = float(self.config.route_count_weight) + np.asarray(
+            model_data.route_prizes[:n_routes], dtype=float
+        )
         for r_idx in route_order:
-            best_v = None
-            best_score = -np.inf
-            for v_idx in range(n_vehicles):
-                if r_idx in model_data.forbidden_nodes.get(v_idx, set()):
-                    continue
-                if r_idx in assigned_routes:
-                    continue
-                score = float(self.config.route_count_weight) + float(
-                    model_data.route_prizes[r_idx]
-                )
-                if score > best_score:
-                    best_score = score
-                    best_v = v_idx
-            if best_v is not None and best_score > -1e5:
+            best_v = int(best_vehicle[r_idx])
+            if best_v >= 0 and scores[r_idx] > -1e5:
                 vehicle_sequences.setdefault(best_v, []).append(r_idx)
-                assigned_routes.add(r_idx)
 
         total_routes = sum(len(s) for s in vehicle_sequences.values())
         obj = sum(
@@ -2,6 +2,7 @@
 
 from dataclasses import dataclass, field
 from datetime import datetime
+from operator import attrgetter
 from typing import Dict, List, Optional, Set, Tuple
 
 import numpy as np
@@ -33,15 +34,31 @@ def build_incompatible_route_pairs(
     Two routes are incompatible if neither can precede the other with required
     turnaround (includes time overlap).
     """
-    pairs: List[Tuple[int, int]] = []
-    n_routes = len(route_start_times)
-    for r1 in range(n_routes):
-        for r2 in range(r1 + 1, n_routes):
-            gap_12 = float(route_start_times[r2] - route_end_times[r1])
-            gap_21 = float(route_start_times[r1] - route_end_times[r2])
-            if gap_12 < turnaround_minutes and gap_21 < turnaround_minutes:
-                pairs.append((r1, r2))
-    return pairs
+    starts = np.asarray(route_start_times, dtype=float)
+    ends = np.asarray(route_end_times, dtype=float)
+    # gaps[r1, r2]: idle minutes if r2 follows r1 on the same vehicle
+    gaps = starts[np.newaxis, :] - ends[:, np.newaxis]
+    too_close = gaps < turnaround_minutes
+    r1s, r2s = np.nonzero(np.triu(too_close & too_close.T, k=1))
+    return list(zip(r1s.tolist(), r2s.tolist()))
+
+
+def first_allowed_vehicle(
+    forbidden_nodes: Dict[int, Set[int]], n_vehicles: int, n_routes: int
+) -> np.ndarray:
+    """
+    Lowest vehicle index allowed to serve each route, or -1 when none is.
+
+    Only route nodes (index < n_routes) of ``forbidden_nodes`` are considered.
+    """
+    if n_vehicles == 0:
+        return np.full(n_routes, -1, dtype=np.intp)
+    allowed = np.ones((n_vehicles, n_routes), dtype=bool)
+    for v_idx, nodes in forbidden_nodes.items():
+        if 0 <= v_idx < n_vehicles:
+            route_nodes = [r for r in nodes if 0 <= r < n_routes]
+            allowed[v_idx, route_nodes] = False
+    return np.where(allowed.any(axis=0), allowed.argmax(axis=0), -1)
 
 
 def apply_incompatible_route_pair_constraints(m, vehicle_sequences, pairs) -> None:
@@ -164,7 +181,7 @@ class AllocationDataBuilder:
         self.n_vehicles = len(vehicles)
         self.n_routes = len(routes)
 
-        self.routes.sort(key=lambda r: r.plan_start_date_time)
+        self.routes.sort(key=attrgetter("plan_start_date_time"))
 
     def _resolve_turnaround_minutes(self) -> int:
         for constraint in self.constraint_manager.get_enabled_constraints():
@@ -195,17 +212,18 @@ class AllocationDataBuilder:
 
         score_vr = np.zeros((n_vehicles, n_routes), dtype=float)
         feasible_vr = np.zeros((n_vehicles, n_routes), dtype=bool)
-        energy_consumption = np.zeros((n_vehicles, n_routes), dtype=float)
+        evaluated_vr = np.zeros((n_vehicles, n_routes), dtype=bool)
 
         route_start_times = np.array(
-            [r.plan_start_date_time.timestamp() / 60.0 for r in self.routes], dtype=float
+            [r.plan_start_ts / 60.0 for r in self.routes], dtype=float
         )
         route_end_times = np.array(
-            [r.plan_end_date_time.timestamp() / 60.0 for r in self.routes], dtype=float
+            [r.plan_end_ts / 60.0 for r in self.routes], dtype=float
         )
         window_origin = 0.0
         if route_start_times.size:
-            window_origin = float(np.min(route_start_times))
+            # Routes are sorted by plan start in __init__, so the first is earliest.
+            window_origin = float(route_start_times[0])
             route_start_times = route_start_times - window_origin
             route_end_times = route_end_times - window_origin
 
@@ -225,9 +243,19 @@ class AllocationDataBuilder:
                     continue
                 score_vr[v_idx, r_idx] = float(evaluation.get("total_cost", 0.0))
                 feasible_vr[v_idx, r_idx] = bool(evaluation.get("is_feasible", False))
-                energy_consumption[v_idx, r_idx] = float(
-                    vehicle.calculate_energy_required(route.plan_mileage or 0.0)
-                )
+                evaluated_vr[v_idx, r_idx] = True
+
+        # Vehicle.calculate_energy_required is mileage * efficiency; do it for
+        # every pair at once and keep only the pairs that were evaluated.
+        efficiencies = np.array(
+            [v.efficiency_kwh_mile for v in self.vehicles], dtype=float
+        )
+        mileages = np.array(
+            [r.plan_mileage or 0.0 for r in self.routes], dtype=float
+        )
+        energy_consumption = np.where(
+            evaluated_vr, np.outer(efficiencies, mileages), 0.0
+        )
 
         distance_matrix = self._build_distance_matrix(
             route_start_times, route_end_times, turnaround_minutes
@@ -440,7 +468,7 @@ class ModelDataBuilder(AllocationDataBuilder):
 
         route_start_times = np.array(
             [
-                (r.plan_start_date_time.timestamp() / 60.0)
+                (r.plan_start_ts / 60.0)
                 - allocation.metadata.get("window_origin_minutes", 0.0)
                 for r in allocation.routes
             ],
@@ -448,7 +476,7 @@ class ModelDataBuilder(AllocationDataBuilder):
         )
         route_end_times = np.array(
             [
-                (r.plan_end_date_time.timestamp() / 60.0)
+                (r.plan_end_ts / 60.0)
                 - allocation.metadata.get("window_origin_minutes", 0.0)
                 for r in allocation.routes
             ],
@@ -467,54 +495,36 @@ class ModelDataBuilder(AllocationDataBuilder):
         rr = allocation.distance_matrix
         dist[:n_routes, :n_routes] = rr
 
+        # Slots are time-ordered: every slot from the first one starting at/after
+        # route end is reachable, everything before stays BIG_VALUE.
+        first_reachable_slot = np.searchsorted(
+            slot_start_times, route_end_times, side="left"
+        )
         for r_idx in range(n_routes):
-            route_end = route_end_times[r_idx]
+            t0 = int(first_reachable_slot[r_idx])
+            if t0 >= n_timesteps:
+                continue
             for c in range(n_chargers):
-                for t in range(n_timesteps):
-                    cn = charge_node_index(n_routes, n_timesteps, c, t)
-                    gap = float(slot_start_times[t] - route_end)
-                    if gap < 0:
-                        dist[r_idx, cn] = BIG_VALUE
-                    else:
-                        dist[r_idx, cn] = 0.0
-
-        for c in range(n_chargers):
-            for t in range(n_timesteps):
-                cn = charge_node_index(n_routes, n_timesteps, c, t)
-                dist[cn, cn] = BIG_VALUE
-                if t + 1 < n_timesteps:
-                    cn_next = charge_node_index(n_routes, n_timesteps, c, t + 1)
-                    dist[cn, cn_next] = 0.0
-                for c2 in range(n_chargers):
-                    if c2 != c:
-                        cn2 = charge_node_index(n_routes, n_timesteps, c2, t)
-                        dist[cn, cn2] = BIG_VALUE
+                start = charge_node_index(n_routes, n_timesteps, c, t0)
+                end = charge_node_index(n_routes, n_timesteps, c, n_timesteps)
+                dist[r_idx, start:end] = 0.0
 
+        # charge->charge: only consecutive slots on the same charger are free;
+        # self-loops and every other pair keep the BIG_VALUE fill.
         for c in range(n_chargers):
-            for t in range(n_timesteps):
-                cn = charge_node_index(n_routes, n_timesteps, c, t)
-                slot_end = slot_start_times[t] + slot_duration
-                for r_idx in range(n_routes):
-                    gap = float(route_start_times[r_idx] - slot_end)
-                    if gap < turnaround:
-                        dist[cn, r_idx] = BIG_VALUE
-                        # if gap < 0:
-                        #     logger.debug(
-                        #         "Infeasible charge->route [%s]->[%s]: overlap %.0f min",
-                        #         cn,
-                        #         r_idx,
-                        #         abs(gap),
-                        #     )
-                        # else:
-                        #     logger.debug(
-                        #         "Infeasible charge->route [%s]->[%s]: gap %.0f < %s",
-                        #         cn,
-                        #         r_idx,
-                        #         gap,
-                        #         turnaround,
-                        #     )
-                    else:
-                        dist[cn, r_idx] = gap
+            first = charge_node_index(n_routes, n_timesteps, c, 0)
+            nodes = np.arange(first, first + n_timesteps)
+            dist[nodes[:-1], nodes[1:]] = 0.0
+
+        # charge->route: gap from slot end to route start, infeasible below the
+        # turnaround. The (slot, route) block is identical for every charger.
+        slot_end_times = slot_start_times + slot_duration
+        charge_route_gap = route_start_times[np.newaxis, :] - slot_end_times[:, np.newaxis]
+        charge_route_block = np.where(
+            charge_route_gap < turnaround, BIG_VALUE, charge_route_gap
+        )
+        first_charge = charge_node_index(n_routes, n_timesteps, 0, 0)
+        dist[first_charge:, :n_routes] = np.tile(charge_route_block, (n_chargers, 1))
 
         route_durations = route_end_times - route_start_times
         node_durations = np.concatenate(
@@ -524,19 +534,15 @@ class ModelDataBuilder(AllocationDataBuilder):
             ]
         )
         is_charge = np.array([0] * n_routes + [1] * (n_chargers * n_timesteps), dtype=int)
-        price_per_slot = [
-            abs(float(ctx.electricity_cost_per_slot[t]))
-            for t in range(n_timesteps)
-        ]
+        slot_costs = np.asarray(
+            ctx.electricity_cost_per_slot[:n_timesteps], dtype=float
+        )
+        price_per_slot = np.abs(slot_costs).tolist()
         if ctx.enable_variable_charger_power:
-            charge_rewards = [0.0] * (n_chargers * n_timesteps)
+            charge_rewards = np.zeros(n_chargers * n_timesteps, dtype=float)
         else:
-            charge_rewards = [
-                ctx.electricity_cost_per_slot[t]
-                for _c in range(n_chargers)
-                for t in range(n_timesteps)
-            ]
-        node_rewards = np.concatenate([allocation.route_prizes, np.array(charge_rewards)])
+            charge_rewards = np.tile(slot_costs, n_chargers)
+        node_rewards = np.concatenate([allocation.route_prizes, charge_rewards])
         charger_max = list(ctx.charger_max_power_kw or [])
         if len(charger_max) < n_chargers:
             charger_max.extend(
@@ -17,6 +17,9 @@ from src.config import (
     UNIFIED_ROUTE_COUNT_WEIGHT,
     UNIFIED_SCHEDULING_TIME_LIMIT,
     UNIFIED_SOC_SHORTFALL_PENALTY,
+    UNIFIED_SOLVER_THREADS,
+    UNIFIED_STALL_RELATIVE_GAP,
+    UNIFIED_STALL_TIME_LIMIT,
 )
 from src.models.allocation import AllocationResult, RouteAllocation
 from src.models.route import Route
@@ -31,6 +34,7 @@ from src.optimizer.cost_matrix import (
     OptimizationModelData,
     apply_incompatible_route_pair_constraints,
     charge_node_index,
+    first_allowed_vehicle,
 )
 from src.optimizer.optimizer_debug import (
     log_model_inputs,
@@ -42,6 +46,13 @@ from src.utils.logging_config import logger
 MODE_FLAG_ALLOCATION = "allocation"
 MODE_FLAG_CHARGE_SCHEDULING = "charge_scheduling"
 MODE_FLAG_CHARGER_ALLOCATION = "charger_allocation"
+_ALLOWED_MODE_FLAGS = frozenset(
+    (
+        MODE_FLAG_ALLOCATION,
+        MODE_FLAG_CHARGE_SCHEDULING,
+        MODE_FLAG_CHARGER_ALLOCATION,
+    )
+)
 
 
 def normalize_mode(mode: Optional[List[str]]) -> List[str]:
@@ -55,12 +66,7 @@ def normalize_mode(mode: Optional[List[str]]) -> List[str]:
             normalized.append(key)
     if not normalized:
         return [MODE_FLAG_ALLOCATION]
-    allowed = {
-        MODE_FLAG_ALLOCATION,
-        MODE_FLAG_CHARGE_SCHEDULING,
-        MODE_FLAG_CHARGER_ALLOCATION,
-    }
-    unknown = set(normalized) - allowed
+    unknown = set(normalized) - _ALLOWED_MODE_FLAGS
     if unknown:
         raise ValueError(f"Unknown mode flags: {sorted(unknown)}")
     if MODE_FLAG_CHARGER_ALLOCATION in normalized and (
@@ -87,6 +93,42 @@ class OptimizationConfig:
     target_soc_percent: float = DEFAULT_TARGET_SOC_PERCENT
     route_energy_safety_margin_kwh: float = DEFAULT_ROUTE_ENERGY_SAFETY_MARGIN_KWH
     enable_variable_charger_power: bool = False
+    nb_threads: int = UNIFIED_SOLVER_THREADS
+    stall_time_limit_seconds: int = UNIFIED_STALL_TIME_LIMIT
+    stall_relative_gap: float = UNIFIED_STALL_RELATIVE_GAP
+
+
+def add_stall_stop(
+    optimizer, objective, stall_seconds: int, relative_gap: float
+) -> None:
+    """Stop the solve once the objective stops improving.
+
+    Registers a tick callback that stops ``optimizer`` when the best objective
+    has not improved by more than ``relative_gap`` (relative to its magnitude)
+    for ``stall_seconds`` of running time.
+    """
+    state = {"best": None, "since": 0, "stopped": False}
+
+    def _on_tick(opt, _cb_type):
+        # Ticks keep arriving until the solver winds down; stop only once
+        if state["stopped"]:
+            return
+        elapsed = opt.statistics.running_time
+        value = objective.value
+        best = state["best"]
+        if best is None or value - best > relative_gap * max(abs(best), 1.0):
+            state["best"] = value
+            state["since"] = elapsed
+        elif elapsed - state["since"] >= stall_seconds:
+            logger.info(
+                "Stopping solve: no objective improvement for %ss (best=%.3f)",
+                stall_seconds,
+                best,
+            )
+            state["stopped"] = True
+            opt.stop()
+
+    optimizer.add_callback(hx.HxCallbackType.TIME_TICKED, _on_tick)
 
 
 @dataclass
@@ -285,6 +327,25 @@ class UnifiedOptimizer:
                 routes_total=n_routes,
             )
 
+        if not model_data.enable_charge_scheduling and not np.any(
+            first_allowed_vehicle(model_data.forbidden_nodes, n_vehicles, n_routes) >= 0
+        ):
+            # Every route is forbidden on every vehicle: the empty plan is optimal
+            logger.info("No vehicle can take any route — skipping Hexaly model build")
+            obj_value = self._idle_fleet_objective(model_data)
+            result = OptimizationResult(
+                status="OPTIMAL",
+                solve_time_seconds=time.time() - start_time,
+                objective_value=obj_value,
+                routes_total=n_routes,
+                allocation_score=obj_value,
+            )
+            warnings = validate_optimization_result(
+                model_data, result, self.config.route_count_weight
+            )
+            self._write_debug_csv(model_data, result, validation_warnings=warnings)
+            return result
+
         with hx.HexalyOptimizer() as optimizer:
             m = optimizer.model
 
@@ -321,17 +382,30 @@ class UnifiedOptimizer:
                 node_charger_arr = m.array(node_to_charger)
                 node_timestep_arr = m.array(node_to_timestep)
                 charger_max = model_data.charger_max_power_kw or []
+                # Site load must stay strictly below slot capacity, so no single
+                # integer power decision can exceed ceil(capacity) - 1
+                if model_data.capacity_power_kw:
+                    slot_cap = np.maximum(
+                        np.ceil(np.asarray(model_data.capacity_power_kw, dtype=float))
+                        - 1,
+                        0,
+                    )
+                else:
+                    slot_cap = np.full(n_timesteps, np.inf)
                 power_grid = []
+                power_upper = []
                 for c in range(n_chargers):
                     max_p = max(1, int(round(float(charger_max[c]))))
-                    power_grid.append(
-                        [m.int(0, max_p) for _ in range(n_timesteps)]
-                    )
+                    upper = np.minimum(slot_cap, max_p).astype(int).tolist()
+                    power_upper.append(upper)
+                    power_grid.append([m.int(0, ub) for ub in upper])
                 charge_power_vars = power_grid
                 charge_power_arr = m.array(power_grid)
                 for c in range(n_chargers):
-                    max_p = max(1, int(round(float(charger_max[c]))))
                     for t in range(n_timesteps):
+                        max_p = power_upper[c][t]
+                        if max_p == 0:
+                            continue  # already zero by its domain
                         node = charge_node_index(n_routes, n_timesteps, c, t)
                         used_terms = [
                             m.contains(seq, node) for seq in vehicle_sequences
@@ -341,7 +415,7 @@ class UnifiedOptimizer:
                             if len(used_terms) == 1
                             else m.sum(used_terms)
                         )
-                        m.constraint(m.at(charge_power_arr, c, t) <= max_p * used)
+                        m.constraint(power_grid[c][t] <= max_p * used)
                 logger.info(
                     "Phase 3 variable charger power: %s chargers × %s slots",
                     n_chargers,
@@ -481,12 +555,12 @@ class UnifiedOptimizer:
                 soc_shortfall_terms.append(route_shortfall + final_shortfall)
 
             if model_data.enable_charge_scheduling and model_data.capacity_power_kw:
+                # Per-slot columns of the charger-major power grid
+                slot_power_vars = [list(col) for col in zip(*charge_power_vars)]
                 for t in range(n_timesteps):
                     cap_kw = float(model_data.capacity_power_kw[t])
                     if variable_power and charge_power_arr is not None:
-                        load_terms = [
-                            m.at(charge_power_arr, c, t) for c in range(n_chargers)
-                        ]
+                        load_terms = slot_power_vars[t]
                         site_load = (
                             load_terms[0]
                             if len(load_terms) == 1
@@ -518,15 +592,15 @@ class UnifiedOptimizer:
             objective = w * route_count_term + prize_term
             if variable_power and charge_power_arr is not None:
                 prices = model_data.electricity_price_per_slot
-                cost_terms = []
-                for c in range(n_chargers):
-                    for t in range(n_timesteps):
-                        price = float(prices[t]) if t < len(prices) else 0.0
-                        cost_terms.append(
-                            -price
-                            * slot_hours
-                            * m.at(charge_power_arr, c, t)
-                        )
+                cost_coef = [
+                    -(float(prices[t]) if t < len(prices) else 0.0) * slot_hours
+                    for t in range(n_timesteps)
+                ]
+                cost_terms = [
+                    cost_coef[t] * power
+                    for row in charge_power_vars
+                    for t, power in enumerate(row)
+                ]
                 charging_cost = (
                     cost_terms[0] if len(cost_terms) == 1 else m.sum(cost_terms)
                 )
@@ -565,6 +639,15 @@ class UnifiedOptimizer:
             m.close()
             optimizer.param.time_limit = self.config.time_limit_seconds
             optimizer.param.verbosity = self.config.verbosity
+            if self.config.nb_threads > 0:
+                optimizer.param.nb_threads = self.config.nb_threads
+            if self.config.stall_time_limit_seconds > 0:
+                add_stall_stop(
+                    optimizer,
+                    objective,
+                    self.config.stall_time_limit_seconds,
+                    self.config.stall_relative_gap,
+                )
             optimizer.solve()
 
             sol = optimizer.solution
@@ -622,11 +705,26 @@ class UnifiedOptimizer:
             )
             return result
 
+    def _idle_fleet_objective(self, model_data: OptimizationModelData) -> float:
+        """Objective the route-only model assigns to the empty plan.
+
+        With no routes, each vehicle ends at its start SOC, so only the final
+        SOC shortfall term of the soft penalty remains.
+        """
+        penalty_per_kwh = float(self.config.soc_shortfall_penalty)
+        if penalty_per_kwh <= 0:
+            return 0.0
+        n_vehicles = len(model_data.vehicles)
+        target_soc_frac = float(self.config.target_soc_percent) / 100.0
+        start_kwh = np.asarray(model_data.battery_start_soc[:n_vehicles], dtype=float)
+        max_kwh = np.asarray(model_data.battery_max_soc[:n_vehicles], dtype=float)
+        shortfall = np.maximum(0.0, max_kwh * target_soc_frac - start_kwh)
+        return -penalty_per_kwh * float(shortfall.sum())
+
     def _greedy_fallback(self, model_data: OptimizationModelData) -> OptimizationResult:
         start_time = time.time()
         n_vehicles = len(model_data.vehicles)
         n_routes = model_data.n_routes
-        assigned_routes: Set[int] = set()
         route_sequences: Dict[int, List[int]] = {}
 
         route_order = sorted(
@@ -635,21 +733,14 @@ class UnifiedOptimizer:
         )
         w = float(self.config.route_count_weight)
 
+        # A route scores the same on every vehicle, so the greedy pick is the
+        # first vehicle it is not forbidden on.
+        best_vehicle = first_allowed_vehicle(model_data.forbidden_nodes, n_vehicles, n_routes)
+        scores = w + np.asarray(model_data.route_prizes[:n_routes], dtype=float)
         for r_idx in route_order:
-            best_v = None
-            best_score = -np.inf
-            for v_idx in range(n_vehicles):
-                if r_idx in model_data.forbidden_nodes.get(v_idx, set()):
-                    continue
-                if r_idx in assigned_routes:
-                    continue
-                score = w + float(model_data.route_prizes[r_idx])
-                if score > best_score:
-                    best_score = score
-                    best_v = v_idx
-            if best_v is not None:
+            best_v = int(best_vehicle[r_idx])
+            if best_v >= 0 and scores[r_idx] > -np.inf:
                 route_sequences.setdefault(best_v, []).append(r_idx)
-                assigned_routes.add(r_idx)
 
         total_routes = sum(len(s) for s in route_sequences.values())
         obj = sum(
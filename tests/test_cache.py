@@ -0,0 +1,54 @@
+"""Unit tests for the in-process TTL cache."""
+
+import time
+
+import pytest
+
+from src.utils.cache import TTLCache
+
+
+def test_get_or_load_caches_none_values():
+    cache = TTLCache(maxsize=4, ttl_seconds=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return None
+
+    assert cache.get_or_load("site", loader) is None
+    assert cache.get_or_load("site", loader) is None
+    assert len(calls) == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(maxsize=4, ttl_seconds=0.01)
+    cache.set("k", 1)
+    time.sleep(0.02)
+    assert cache.get("k", "miss") == "miss"
+
+
+def test_oldest_entry_evicted_when_full():
+    cache = TTLCache(maxsize=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
+
+
+def test_loader_errors_are_not_cached():
+    cache = TTLCache(maxsize=4, ttl_seconds=60)
+
+    def failing():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("k", failing)
+    assert cache.get_or_load("k", lambda: 5) == 5
+
+
+def test_zero_ttl_disables_caching():
+    cache = TTLCache(maxsize=4, ttl_seconds=0)
+    cache.set("k", 1)
+    assert cache.get("k") is None
@@ -0,0 +1,271 @@
+"""Unit tests for the pooled database connection, against a fake psycopg2 pool."""
+
+import threading
+import time
+
+import psycopg2
+import pytest
+from psycopg2.pool import PoolError
+
+from src.database import connection
+from src.database.queries import PreparedQueries, Queries
+
+
+class FakeCursor:
+    def __init__(self, conn, name=None):
+        self.connection = conn
+        self.name = name
+        self.itersize = None
+        self.closed = False
+
+    def execute(self, query, params=None):
+        pool = self.connection.pool
+        if query.startswith("PREPARE"):
+            # Checkout's PREPARE round-trip is tracked apart from the caller's work
+            self.connection.preparing = True
+            pool.prepared.append(query)
+        else:
+            pool.executed.append((query, params))
+        if pool.fail_on is not None and pool.fail_on in query:
+            raise psycopg2.Error(f"failed: {pool.fail_on}")
+
+    def fetchall(self):
+        return list(self.connection.pool.rows)
+
+    def __iter__(self):
+        return iter(self.connection.pool.rows)
+
+    def copy_expert(self, sql, buffer):
+        self.connection.pool.copied.append((sql, buffer.read()))
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.closed = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.preparing = False
+        self.prepare_ends = []
+        self.cursors = []
+
+    def cursor(self, name=None, cursor_factory=None):
+        cursor = FakeCursor(self, name=name)
+        self.cursors.append(cursor)
+        return cursor
+
+    def commit(self):
+        if self.preparing:
+            self.preparing = False
+            self.prepare_ends.append("commit")
+        else:
+            self.commits += 1
+
+    def rollback(self):
+        if self.preparing:
+            self.preparing = False
+            self.prepare_ends.append("rollback")
+        else:
+            self.rollbacks += 1
+
+
+class FakePool:
+    """Mirrors ThreadedConnectionPool: getconn raises once maxconn are out."""
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.maxconn = maxconn
+        self.closed = False
+        self.executed = []
+        self.prepared = []
+        self.copied = []
+        self.rows = []
+        self.fail_on = None
+        self.getconn_error = None
+        self.connections = []
+        self.peak_in_use = 0
+        self._idle = []
+        self._in_use = set()
+        self._lock = threading.Lock()
+
+    def getconn(self):
+        with self._lock:
+            if self.getconn_error is not None:
+                raise self.getconn_error
+            if len(self._in_use) >= self.maxconn:
+                raise PoolError("connection pool exhausted")
+            conn = self._idle.pop() if self._idle else FakeConnection(self)
+            if conn not in self.connections:
+                self.connections.append(conn)
+            self._in_use.add(conn)
+            self.peak_in_use = max(self.peak_in_use, len(self._in_use))
+            return conn
+
+    def putconn(self, conn, close=False):
+        with self._lock:
+            self._in_use.discard(conn)
+            self._idle.append(conn)
+
+    def closeall(self):
+        self.closed = True
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(connection, "ThreadedConnectionPool", FakePool)
+    monkeypatch.setattr(connection, "DB_POOL_MAX_CONNECTIONS", 2)
+    return connection.DatabaseConnection()
+
+
+def test_checkout_waits_for_a_free_connection_instead_of_raising(db):
+    pool = db.connect()
+    start = threading.Barrier(8)
+    errors = []
+
+    def worker():
+        start.wait()
+        try:
+            with db.get_cursor() as cursor:
+                cursor.execute("SELECT 1")
+                time.sleep(0.01)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(pool.executed) == 8
+    assert pool.peak_in_use <= 2
+
+
+def test_failed_getconn_frees_its_slot(db, monkeypatch):
+    monkeypatch.setattr(connection, "DB_POOL_CHECKOUT_TIMEOUT_SECONDS", 0.1)
+    pool = db.connect()
+    pool.getconn_error = psycopg2.OperationalError("server closed the connection")
+    for _ in range(3):
+        with pytest.raises(psycopg2.OperationalError):
+            db.execute_query("SELECT 1")
+
+    pool.getconn_error = None
+    db.execute_query("SELECT 1")
+    assert pool.executed == [("SELECT 1", None)]
+
+
+def test_get_cursor_commits_on_success_and_rolls_back_on_error(db):
+    pool = db.connect()
+    db.execute_query("SELECT %s", (1,))
+    pool.fail_on = "broken"
+    with pytest.raises(psycopg2.Error):
+        db.execute_query("SELECT broken")
+
+    (conn,) = pool.connections
+    assert pool.executed == [("SELECT %s", (1,)), ("SELECT broken", None)]
+    assert (conn.commits, conn.rollbacks) == (1, 1)
+    assert all(cursor.closed for cursor in conn.cursors)
+
+
+def test_transaction_pins_one_connection_and_commits_once(db):
+    pool = db.connect()
+    with db.transaction() as conn:
+        db.execute_query("DELETE FROM t", fetch=False)
+        db.execute_query("INSERT INTO t VALUES (%s)", (1,), fetch=False)
+        assert conn.commits == 0
+
+    assert pool.connections == [conn]
+    assert (conn.commits, conn.rollbacks) == (1, 0)
+
+
+def test_transaction_rolls_back_every_statement_on_error(db):
+    pool = db.connect()
+    pool.fail_on = "INSERT"
+    with pytest.raises(psycopg2.Error):
+        with db.transaction() as conn:
+            db.execute_query("DELETE FROM t", fetch=False)
+            db.execute_query("INSERT INTO t VALUES (%s)", (1,), fetch=False)
+
+    assert (conn.commits, conn.rollbacks) == (0, 1)
+    assert db._local.connection is None
+
+
+def test_stream_query_uses_a_named_cursor_with_itersize(db):
+    pool = db.connect()
+    pool.rows = [{"id": 1}, {"id": 2}]
+
+    rows = list(db.stream_query("SELECT id FROM t WHERE site_id = %s", (7,), itersize=50))
+
+    (conn,) = pool.connections
+    cursor = conn.cursors[-1]
+    assert rows == [{"id": 1}, {"id": 2}]
+    assert cursor.name.startswith("stream_")
+    assert cursor.itersize == 50
+    assert pool.executed == [("SELECT id FROM t WHERE site_id = %s", (7,))]
+    assert (conn.commits, cursor.closed) == (1, True)
+
+
+def test_execute_values_bulk_pages_rows_and_skips_empty_input(db, monkeypatch):
+    pool = db.connect()
+    calls = []
+    monkeypatch.setattr(
+        connection,
+        "execute_values",
+        lambda cur, query, rows, page_size: calls.append((query, rows, page_size)),
+    )
+
+    db.execute_values_bulk("INSERT INTO t VALUES %s", [])
+    assert calls == [] and pool.connections == []
+
+    db.execute_values_bulk("INSERT INTO t VALUES %s", [(1,), (2,)], page_size=1)
+    assert calls == [("INSERT INTO t VALUES %s", [(1,), (2,)], 1)]
+    assert pool.connections[0].commits == 1
+
+
+def test_copy_rows_bulk_streams_csv_with_empty_nulls(db):
+    pool = db.connect()
+    copy_sql = "COPY t (a, b, c) FROM STDIN WITH (FORMAT CSV)"
+
+    db.copy_rows_bulk(copy_sql, iter([]))
+    assert pool.connections == []
+
+    db.copy_rows_bulk(copy_sql, [(1, None, "x,y"), (2, 0.5, "z")])
+    assert pool.copied == [(copy_sql, '1,,"x,y"\r\n2,0.5,z\r\n')]
+    assert pool.connections[0].commits == 1
+
+
+def test_checkout_prepares_registered_statements_once_per_connection(db):
+    pool = db.connect()
+    db.execute_prepared(PreparedQueries.GET_SCHEDULER_CONFIG, (5,))
+    db.execute_prepared(PreparedQueries.GET_SCHEDULER_CONFIG, (6,))
+
+    (conn,) = pool.connections
+    (prepare_sql,) = pool.prepared
+    assert conn.prepare_ends == ["commit"]
+    for name in PreparedQueries.STATEMENTS:
+        assert f"PREPARE {name} AS" in prepare_sql
+    assert "%s" not in prepare_sql
+    assert pool.executed == [
+        ("EXECUTE get_scheduler_config (%s)", (5,)),
+        ("EXECUTE get_scheduler_config (%s)", (6,)),
+    ]
+
+
+def test_failed_prepare_falls_back_to_plain_statements(db):
+    pool = db.connect()
+    pool.fail_on = "PREPARE"
+    db.execute_prepared(PreparedQueries.GET_SCHEDULER_CONFIG, (5,))
+
+    (conn,) = pool.connections
+    assert conn.prepare_ends == ["rollback"]
+    assert pool.executed == [(Queries.GET_SCHEDULER_CONFIG, (5,))]
+    assert (conn.commits, conn.rollbacks) == (1, 0)
@@ -0,0 +1,150 @@
+"""Unit tests for route and vehicle data models."""
+
+from datetime import datetime, timedelta
+
+from dataclasses import FrozenInstanceError, replace
+
+import pytest
+
+from src.models.allocation import AllocationResult, RouteAllocation
+from src.models.route import Route
+from src.models.scheduler import ChargeSlot
+from src.models.vehicle import Vehicle
+
+
+def _route_row(route_id: str = "R1", **overrides) -> dict:
+    start = datetime(2026, 6, 1, 6, 0, 0)
+    row = {
+        "route_id": route_id,
+        "site_id": 10,
+        "vehicle_id": None,
+        "route_status": "N",
+        "route_alias": f"alias-{route_id}",
+        "plan_start_date_time": start,
+        "actual_start_date_time": None,
+        "plan_end_date_time": start + timedelta(hours=2),
+        "actual_end_date_time": None,
+        "plan_mileage": 50.0,
+        "n_orders": 3,
+    }
+    row.update(overrides)
+    return row
+
+
+def _vehicle_row(vehicle_id: int = 1, **overrides) -> dict:
+    row = {
+        "vehicle_id": vehicle_id,
+        "site_id": 10,
+        "active": True,
+        "VOR": False,
+        "charge_power_ac": 11.0,
+        "charge_power_dc": 50.0,
+        "battery_capacity": 100.0,
+        "efficiency_kwh_mile": 0.35,
+        "telematic_label": "T1",
+    }
+    row.update(overrides)
+    return row
+
+
+def test_route_from_row_matches_kwargs_construction():
+    row = _route_row(vehicle_id=7, energy_kwh=12.5)
+    assert Route.from_row(row) == Route(**row)
+
+
+def test_route_from_row_defaults_optional_columns():
+    row = _route_row()
+    del row["vehicle_id"], row["actual_start_date_time"], row["actual_end_date_time"]
+    route = Route.from_row(row)
+    assert route.vehicle_id is None
+    assert route.energy_kwh is None
+    assert route.duration_minutes == pytest.approx(120.0)
+
+
+def test_route_has_no_instance_dict():
+    route = Route.from_row(_route_row())
+    assert not hasattr(route, "__dict__")
+
+
+def test_route_positional_row_matches_from_row():
+    row = _route_row(vehicle_id=7)
+    positional = (
+        row["route_id"], row["site_id"], row["route_alias"], row["route_status"],
+        row["plan_start_date_time"], row["plan_end_date_time"],
+        row["plan_mileage"], row["n_orders"],
+        row["vehicle_id"], row["actual_start_date_time"], row["actual_end_date_time"],
+    )
+    assert Route(*positional) == Route.from_row(row)
+
+
+def test_route_is_immutable():
+    route = Route.from_row(_route_row())
+    with pytest.raises(FrozenInstanceError):
+        route.plan_mileage = 1.0
+
+
+def test_vehicle_from_row_matches_kwargs_construction():
+    row = _vehicle_row()
+    vehicle = Vehicle.from_row(row)
+    assert vehicle == Vehicle(**row)
+    assert vehicle.estimated_soc is None
+
+
+def test_vehicle_is_slotted_and_mutable():
+    vehicle = Vehicle.from_row(_vehicle_row())
+    assert not hasattr(vehicle, "__dict__")
+    vehicle.available_energy_kwh = 42.0
+    assert vehicle.available_energy_kwh == 42.0
+
+
+def test_charge_slot_is_slotted_and_immutable():
+    slot = ChargeSlot(time_slot=datetime(2026, 6, 1, 6, 0), charge_power_kw=22.0)
+    assert not hasattr(slot, "__dict__")
+    with pytest.raises(FrozenInstanceError):
+        slot.charge_power_kw = 0.0
+
+
+def test_route_allocation_is_slotted():
+    alloc = RouteAllocation("R1", 1, datetime(2026, 6, 1, 9, 0), 80.0)
+    assert not hasattr(alloc, "__dict__")
+
+
+def test_vehicle_sequences_keep_allocation_order_per_vehicle():
+    arrival = datetime(2026, 6, 1, 9, 0)
+    result = AllocationResult(1, 10, arrival, arrival, arrival)
+    for route_id, vehicle_id in (("R1", 1), ("R2", 2), ("R3", 1)):
+        result.add_allocation(RouteAllocation(route_id, vehicle_id, arrival, 80.0))
+    assert result.get_vehicle_sequences() == {1: ["R1", "R3"], 2: ["R2"]}
+
+
+def test_overlap_respects_turnaround():
+    first = Route.from_row(_route_row("R1"))
+    start = first.plan_end_date_time + timedelta(minutes=30)
+    second = Route.from_row(
+        _route_row("R2", plan_start_date_time=start, plan_end_date_time=start + timedelta(hours=1))
+    )
+    assert not first.overlaps_with(second, turnaround_minutes=30)
+    assert first.overlaps_with(second, turnaround_minutes=45)
+    assert first.can_be_sequenced_before(second, turnaround_minutes=30)
+    assert not first.can_be_sequenced_before(second, turnaround_minutes=45)
+
+
+def test_overlap_fast_path_matches_datetime_check():
+    first = Route.from_row(_route_row("R1"))
+    start = first.plan_end_date_time + timedelta(minutes=30)
+    second = Route.from_row(
+        _route_row("R2", plan_start_date_time=start, plan_end_date_time=start + timedelta(hours=1))
+    )
+    assert second.plan_start_ts == start.timestamp()
+    for minutes in (0, 30, 45):
+        assert first.overlaps_with_ts(
+            second.plan_start_ts, second.plan_end_ts, minutes * 60.0
+        ) == first.overlaps_with(second, turnaround_minutes=minutes)
+
+
+def test_route_duration_follows_replaced_times():
+    route = Route.from_row(_route_row())
+    shorter = replace(route, plan_end_date_time=route.plan_start_date_time + timedelta(minutes=90))
+    assert route.duration_hours == pytest.approx(2.0)
+    assert shorter.duration_minutes == pytest.approx(90.0)
+    assert "_duration_seconds" not in repr(shorter)
@@ -0,0 +1,76 @@
+"""Unit tests for MAF parameter parsing."""
+
+import logging
+from datetime import time
+
+from src.maf.parameter_parser import get_all_constraint_configs, parse_maf_parameter
+
+
+def test_none_like_values_parse_to_none():
+    for value in ("NONE", "None", "none", "NO_VALUE", "", None):
+        assert parse_maf_parameter("turnaround_minutes", value) is None
+
+
+def test_boolean_by_suffix_and_by_value():
+    assert parse_maf_parameter("constraint_x_enabled", "1") is True
+    assert parse_maf_parameter("constraint_x_flag", "0") is False
+    assert parse_maf_parameter("any_name", "Yes") is True
+    assert parse_maf_parameter("turnaround_minutes", "false") is False
+
+
+def test_key_without_underscore_has_no_suffix():
+    # Vehicle "enabled" flags are only booleans when spelled as one.
+    assert parse_maf_parameter("enabled", "1") == "1"
+    assert parse_maf_parameter("enabled", "true") is True
+
+
+def test_numeric_suffixes():
+    assert parse_maf_parameter("turnaround_minutes", "45") == 45
+    assert parse_maf_parameter("route_energy_margin", "5.5") == 5.5
+    assert parse_maf_parameter("turnaround_minutes", "abc") is None
+    # Only the last word of the name counts as the suffix.
+    assert parse_maf_parameter("minutes_label", "45") == "45"
+
+
+def test_json_values():
+    assert parse_maf_parameter("vehicle_list", " [1, 2, 3]") == [1, 2, 3]
+    assert parse_maf_parameter("weights", '{"a": 1}') == {"a": 1}
+    assert parse_maf_parameter("vehicle_list", "[1, 2") == "[1, 2"
+
+
+def test_time_period():
+    assert parse_maf_parameter("triad_start_period", "16:30:00") == time(16, 30)
+    assert parse_maf_parameter("triad_start_period", "afternoon") == "afternoon"
+    assert parse_maf_parameter("triad_start_period", "25:00:00") is None
+
+
+def test_json_results_are_not_shared_between_calls():
+    first = parse_maf_parameter("vehicle_list", "[1, 2]")
+    first.append(3)
+    assert parse_maf_parameter("vehicle_list", "[1, 2]") == [1, 2]
+
+
+def test_parse_failures_are_reported_on_every_call(caplog):
+    with caplog.at_level(logging.ERROR):
+        assert parse_maf_parameter("turnaround_minutes", "4x") is None
+        assert parse_maf_parameter("turnaround_minutes", "4x") is None
+    errors = [
+        r for r in caplog.records
+        if r.levelno == logging.ERROR and "turnaround_minutes" in r.getMessage()
+    ]
+    assert len(errors) == 2
+
+
+def test_constraint_configs_only_see_their_own_parameters():
+    params = {
+        "constraint_turnaround_time_strict_enabled": "true",
+        "constraint_turnaround_time_strict_penalty": "-22",
+        "constraint_turnaround_time_preferred_minutes": "60",
+        "constraint_shift_hours_strict_enabled": "false",
+        "allocation_window_hours": "18",
+    }
+    configs = get_all_constraint_configs(10, {"parameters": params})
+    assert configs["turnaround_time_strict"]["params"] == {"penalty": -22}
+    assert configs["turnaround_time_strict"]["penalty"] == -22
+    assert configs["turnaround_time_preferred"]["params"] == {"minutes": 60}
+    assert configs["shift_hours_strict"]["enabled"] is False
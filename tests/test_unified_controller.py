@@ -0,0 +1,133 @@
+"""Unit tests for UnifiedController persistence, against a fake psycopg2 pool."""
+
+from datetime import datetime, timedelta
+
+import psycopg2
+import pytest
+
+from src.controllers import unified_controller
+from src.controllers.unified_controller import UnifiedController
+from src.database import connection
+from src.database.queries import Queries
+from src.models.allocation import AllocationResult, RouteAllocation
+from src.models.scheduler import ChargeScheduleResult, ChargeSlot, VehicleChargeSchedule
+from tests.test_connection import FakePool
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(connection, "ThreadedConnectionPool", FakePool)
+    # execute_values needs a live connection to mogrify; record the page instead
+    monkeypatch.setattr(
+        connection,
+        "execute_values",
+        lambda cur, query, rows, page_size: cur.execute(query, list(rows)),
+    )
+    fake_db = connection.DatabaseConnection()
+    monkeypatch.setattr(unified_controller, "db", fake_db)
+    return fake_db.connect()
+
+
+def _allocation_result():
+    eta = datetime(2026, 10, 16, 9, 0)
+    result = AllocationResult(
+        allocation_id=42,
+        site_id=7,
+        run_datetime=eta,
+        window_start=eta,
+        window_end=eta,
+    )
+    result.add_allocation(RouteAllocation("R1", 101, eta, 80.0))
+    result.add_allocation(RouteAllocation("R2", 102, eta, 65.5))
+    return result
+
+
+def test_persist_allocation_replaces_site_rows_in_one_transaction(pool):
+    eta = datetime(2026, 10, 16, 9, 0)
+    UnifiedController(site_id=7)._persist_allocation(_allocation_result())
+
+    (conn,) = pool.connections
+    assert pool.executed == [
+        (Queries.DELETE_SITE_ALLOCATIONS, (7,)),
+        (
+            Queries.INSERT_ROUTE_ALLOCATED_WITH_HISTORY_VALUES,
+            [
+                (42, "R1", 7, 101, "N", eta, 80.0, -1, 101),
+                (42, "R2", 7, 102, "N", eta, 65.5, -1, 102),
+            ],
+        ),
+    ]
+    assert (conn.commits, conn.rollbacks) == (1, 0)
+
+
+def test_persist_allocation_keeps_old_rows_when_insert_fails(pool):
+    pool.fail_on = "WITH ins AS"
+    with pytest.raises(psycopg2.Error):
+        UnifiedController(site_id=7)._persist_allocation(_allocation_result())
+
+    (conn,) = pool.connections
+    assert [query for query, _ in pool.executed] == [
+        Queries.DELETE_SITE_ALLOCATIONS,
+        Queries.INSERT_ROUTE_ALLOCATED_WITH_HISTORY_VALUES,
+    ]
+    assert (conn.commits, conn.rollbacks) == (0, 1)
+
+
+def _schedule_result(slots):
+    schedule = VehicleChargeSchedule(
+        vehicle_id=101,
+        charge_slots=[ChargeSlot(slots[2], 7.0), ChargeSlot(slots[5], 11.0)],
+        assigned_charger_id=3,
+        assigned_charger_power_kw=22.0,
+    )
+    return ChargeScheduleResult(
+        schedule_id=9,
+        site_id=7,
+        planning_start=slots[0],
+        planning_end=slots[-1] + timedelta(minutes=30),
+        vehicle_schedules=[schedule],
+    )
+
+
+def test_persist_schedule_upserts_column_arrays(pool, monkeypatch):
+    monkeypatch.setattr(unified_controller, "CHARGE_SCHEDULE_PERSIST_ZERO_SLOTS", False)
+    controller = UnifiedController(site_id=7, schedule_id=9)
+    slots = controller._build_time_slots(datetime(2026, 10, 16, 18, 0))
+
+    controller._persist_schedule(_schedule_result(slots), slots)
+
+    (conn,) = pool.connections
+    (delete_sql, delete_params), (upsert_sql, upsert_params) = pool.executed
+    assert delete_sql == Queries.DELETE_CHARGE_SCHEDULE_OBSOLETE_SLOTS
+    assert delete_params == (9, [101, 101], [slots[2], slots[5]])
+    assert upsert_sql == Queries.UPSERT_CHARGE_SCHEDULE_UNNEST
+    assert upsert_params[:3] == (9, None, True)
+    assert upsert_params[4:] == (
+        250, None, [101, 101], [slots[2], slots[5]], [7.0, 11.0], ["3", "3"], [22.0, 22.0]
+    )
+    assert (conn.commits, conn.rollbacks) == (1, 0)
+
+
+def test_persist_schedule_copies_large_batches_after_delete(pool, monkeypatch):
+    monkeypatch.setattr(unified_controller, "DB_BULK_COPY_THRESHOLD_ROWS", 10)
+    controller = UnifiedController(site_id=7, schedule_id=9)
+    slots = controller._build_time_slots(datetime(2026, 10, 16, 18, 0))
+
+    controller._persist_schedule(_schedule_result(slots), slots)
+
+    (conn,) = pool.connections
+    assert pool.executed == [(Queries.DELETE_CHARGE_SCHEDULE_BY_SCHEDULE_ID, (9,))]
+    ((copy_sql, csv_text),) = pool.copied
+    assert copy_sql == Queries.COPY_CHARGE_SCHEDULE
+    # Zero-power slots are kept: the full 48-slot profile is written
+    assert len(csv_text.splitlines()) == 48
+    assert (conn.commits, conn.rollbacks) == (1, 0)
+
+
+def test_fleet_efficiency_binds_site_for_view_and_live_fallback(pool):
+    pool.rows = [{"vehicle_count": 3, "fleet_avg_efficiency": 1.25}]
+    assert UnifiedController._fetch_fleet_efficiency(7) == 1.25
+
+    pool.rows = []
+    assert UnifiedController._fetch_fleet_efficiency(7) is None
+    assert pool.executed == [(Queries.GET_FLEET_EFFICIENCY, (7, 7, 7))] * 2
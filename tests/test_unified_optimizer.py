@@ -15,10 +15,12 @@ from src.optimizer.cost_matrix import (
     ModelDataBuilder,
     build_incompatible_route_pairs,
     charge_node_index,
+    first_allowed_vehicle,
 )
 from src.optimizer.unified_optimizer import (
     OptimizationConfig,
     UnifiedOptimizer,
+    add_stall_stop,
     normalize_mode,
 )
 
@@ -299,6 +301,13 @@ def test_incompatible_route_pairs_detect_overlap():
     assert pairs == [(0, 1)]
 
 
+def test_first_allowed_vehicle_skips_forbidden_and_charge_nodes():
+    forbidden = {0: {0, 2, 7}, 1: {2}, 5: {1}}
+    picks = first_allowed_vehicle(forbidden, n_vehicles=2, n_routes=3)
+    assert picks.tolist() == [1, 0, -1]
+    assert first_allowed_vehicle({}, n_vehicles=0, n_routes=2).tolist() == [-1, -1]
+
+
 def test_model_data_includes_incompatible_pairs(minimal_problem):
     data = minimal_problem
     assert hasattr(data, "incompatible_route_pairs")
@@ -339,3 +348,49 @@ def test_unified_optimizer_greedy_or_hexaly(minimal_problem):
     assert result.status in ("OPTIMAL", "FEASIBLE", "INFEASIBLE", "INCONSISTENT")
     assert result.routes_total == 3
     assert 0 <= result.routes_allocated <= 3
+
+
+def test_unified_optimizer_skips_model_when_no_route_is_allowed(minimal_problem, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = minimal_problem
+    data.forbidden_nodes = {v: set(range(data.n_routes)) for v in range(len(data.vehicles))}
+    data.battery_start_soc = np.array([80.0, 95.0])
+    data.battery_max_soc = np.array([100.0, 100.0])
+    config = OptimizationConfig(
+        time_limit_seconds=5, soc_shortfall_penalty=2.0, target_soc_percent=90.0
+    )
+    result = UnifiedOptimizer(config)._solve_hexaly(data)
+    assert result.status == "OPTIMAL"
+    assert result.routes_allocated == 0
+    assert result.routes_total == 3
+    assert result.vehicle_route_sequences == {}
+    # Only the first vehicle is short of the 90 kWh target: 2.0 * 10 kWh
+    assert result.objective_value == pytest.approx(-20.0)
+
+
+def test_stall_stop_stops_after_no_improvement():
+    class _Stats:
+        running_time = 0
+
+    class _Optimizer:
+        def __init__(self):
+            self.statistics = _Stats()
+            self.stopped_at = None
+            self.callback = None
+
+        def add_callback(self, _cb_type, callback):
+            self.callback = callback
+
+        def stop(self):
+            self.stopped_at = self.statistics.running_time
+
+    class _Objective:
+        value = 0.0
+
+    optimizer, objective = _Optimizer(), _Objective()
+    add_stall_stop(optimizer, objective, stall_seconds=3, relative_gap=0.01)
+    for second, value in enumerate([10.0, 20.0, 20.05, 20.1, 20.1, 20.1]):
+        optimizer.statistics.running_time = second
+        objective.value = value
+        optimizer.callback(optimizer, None)
+    assert optimizer.stopped_at == 4